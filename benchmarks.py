@@ -0,0 +1,396 @@
+# benchmarks.py
+"""
+Micro-benchmarks للمؤشرات و build_signal و format_msg/log_signal — offline بالكامل.
+
+    python benchmarks.py                 # مقارنة بالـ baseline (exit 1 لو فيه regression)
+    python benchmarks.py --update        # كتابة baseline جديد
+    python benchmarks.py --recorded BTCUSDT   # إضافة fixtures من candle_archive
+
+الأوقات بتتقسم على calibration loop ثابت علشان الـ baseline يبقى قابل للمقارنة بين الأجهزة.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import config
+import memo
+import scanner_logic
+import signal_index
+import main
+
+BASELINE_FILE = "bench_baselines.json"
+DEFAULT_TOLERANCE = 0.50          # 50% أبطأ من الـ baseline = regression
+NOISE_FLOOR_SECONDS = 3e-6        # فروق أقل من 3µs في النداء الواحد = noise
+NOISE_FLOOR_RATIO = 0.25          # ... أو أقل من 25% من الـ baseline نفسه (الأكبر فيهم)
+SIZES = (80, 1_000, 10_000, 100_000)
+SEED = 1337
+MIN_SAMPLE_SECONDS = 0.005
+REPEATS = 3
+ROUNDS = 7                        # كل الـ benchmarks بتتعاد ROUNDS مرة بالتبادل، وبناخد الأقل
+CONFIRM_ROUNDS = 5                # المشكوك فيهم بيتقاسوا تاني CONFIRM_ROUNDS مرة، والأغلبية بتحكم
+
+CALIBRATION = "__calibration__"
+
+INTERVALS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000}
+
+
+# ===============================
+#  Fixtures
+# ===============================
+def synthetic_klines(n: int, interval: str = "15m", seed: int = SEED) -> List[Dict]:
+    """شموع random walk ثابتة (نفس الـ seed = نفس الشموع)."""
+    rng = random.Random(f"{seed}-{interval}-{n}")
+    step = INTERVALS[interval]
+    t0 = 1_700_000_000_000 // step * step
+    price = 100.0
+    klines = []
+    for i in range(n):
+        open_p = price
+        price = max(0.01, price * (1 + rng.gauss(0.0002, 0.01)))
+        high = max(open_p, price) * (1 + rng.random() * 0.004)
+        low = min(open_p, price) * (1 - rng.random() * 0.004)
+        volume = rng.lognormvariate(8, 1)
+        klines.append({
+            "open_time": t0 + i * step,
+            "open": open_p,
+            "high": high,
+            "low": low,
+            "close": price,
+            "volume": volume,
+            "close_time": t0 + (i + 1) * step - 1,
+        })
+    return klines
+
+
+def recorded_klines(symbol: str) -> Dict[str, List[Dict]]:
+    """شموع حقيقية من candle_archive (لو موجودة) لكل فريم."""
+    import candle_archive
+
+    series = {}
+    for interval in INTERVALS:
+        records = candle_archive.tail(symbol, interval, max(SIZES))
+        if len(records):
+            series[interval] = candle_archive.to_klines(records)
+    return series
+
+
+# ===============================
+#  Timing
+# ===============================
+def time_call(fn: Callable[[], object], reset: Optional[Callable[[], None]] = None) -> float:
+    """
+    وقت نداء واحد بالثواني (أقل عينة من REPEATS — الأقل تأثرًا بالـ noise).
+    reset (لو موجود) بيتنادى قبل كل عينة برّه التوقيت — للـ cases اللي بتكبّر state.
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            if reset:
+                reset()
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE_SECONDS:
+                break
+            loops *= 2 if elapsed == 0 else max(2, int(MIN_SAMPLE_SECONDS / elapsed) + 1)
+
+        samples = [elapsed / loops]
+        for _ in range(REPEATS - 1):
+            if reset:
+                reset()
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - start) / loops)
+        return min(samples)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def calibration() -> float:
+    """وقت loop ثابت — وحدة القياس اللي بنقسم عليها."""
+    def work():
+        total = 0.0
+        for i in range(10_000):
+            total += (i * 0.5) / (i + 1)
+        return total
+    return time_call(work)
+
+
+def run_rounds(cases: Dict[str, Callable]) -> Dict[str, float]:
+    """
+    كل الـ cases (ومعاهم الـ calibration) بيتقاسوا ROUNDS مرة بالتبادل —
+    أي تهنيج مؤقت في الجهاز بيأثر على round واحدة بس، وبناخد الأقل.
+    الـ case يا إما fn يا إما (fn, reset).
+    """
+    best: Dict[str, float] = {}
+    for _ in range(ROUNDS):
+        t = calibration()
+        best[CALIBRATION] = min(t, best.get(CALIBRATION, t))
+        for name, case in cases.items():
+            fn, reset = case if isinstance(case, tuple) else (case, None)
+            t = time_call(fn, reset)
+            best[name] = min(t, best.get(name, t))
+    return best
+
+
+# ===============================
+#  Cases
+# ===============================
+TICKER = {"quoteVolume": "25000000", "priceChangePercent": "4.2"}
+LIVE_VARIANTS = 16
+
+
+@contextmanager
+def offline():
+    """
+    الـ patches بتاعة الـ benchmarks (client متزيف، من غير net flow، log مؤقت) —
+    بترجع زي ما كانت بعد الـ with، فـ import benchmarks ما بيغيرش scanner_logic/main.
+    """
+    saved = (scanner_logic.get_klines_cached, scanner_logic.get_24h_ticker,
+             scanner_logic.NET_FLOW_ENABLED, main.LOG_FILE)
+    scanner_logic.NET_FLOW_ENABLED = False  # مفيش network في الـ benchmarks
+    try:
+        yield
+    finally:
+        (scanner_logic.get_klines_cached, scanner_logic.get_24h_ticker,
+         scanner_logic.NET_FLOW_ENABLED, main.LOG_FILE) = saved
+
+
+def stub_client(series: Dict[str, List[Dict]], ticker: Dict = TICKER):
+    """لازم جوه offline()."""
+    scanner_logic.get_klines_cached = lambda symbol, interval, limit: series[interval]
+    scanner_logic.get_24h_ticker = lambda symbol: ticker
+
+
+def live_variants(kline: Dict) -> List[Dict]:
+    """نفس الشمعة الحالية بأسعار/فوليوم مختلفة — الشموع المقفولة (والـ fingerprint) زي ما هي."""
+    variants = []
+    for i in range(LIVE_VARIANTS):
+        close = kline["close"] * (1 + (i - LIVE_VARIANTS / 2) * 0.002)
+        variants.append(dict(
+            kline, close=close, volume=kline["volume"] * (1 + i * 0.1),
+            high=max(kline["high"], close), low=min(kline["low"], close),
+        ))
+    return variants
+
+
+def indicator_cases(label: str, klines: List[Dict]) -> Dict[str, Callable]:
+    closes = [k["close"] for k in klines]
+    highs = [k["high"] for k in klines]
+    vols = [k["volume"] for k in klines]
+    last = klines[-1]
+    return {
+        f"ema/{label}": lambda: scanner_logic.ema(closes, config.EMA_SLOW_PERIOD),
+        f"rsi/{label}": lambda: scanner_logic.rsi(closes, config.RSI_PERIOD),
+        f"rsi_history/{label}": lambda: scanner_logic.rsi_history(
+            closes, config.RSI_PERIOD, config.RSI_RECENT_LOOKBACK),
+        f"volume_spike/{label}": lambda: scanner_logic.volume_spike(vols, config.MAIN_VOLUME_WINDOW),
+        f"net_volume/{label}": lambda: scanner_logic.net_volume(klines, config.NET_VOLUME_WINDOW_15),
+        f"is_breakout/{label}": lambda: scanner_logic.is_breakout(highs, closes, config.BREAKOUT_LOOKBACK),
+        f"small_uptrend_score/{label}": lambda: scanner_logic.small_uptrend_score(closes),
+        f"bull_strength/{label}": lambda: scanner_logic.bull_strength(
+            last["open"], last["high"], last["low"], last["close"]),
+    }
+
+
+def signal_cases(label: str, series: Dict[str, List[Dict]]) -> Dict[str, Callable]:
+    def cold():
+        memo.clear()
+        stub_client(series)
+        return scanner_logic.evaluate_symbol("BENCHUSDT")
+
+    # stage memos سخنة بس كل نداء بشمعة حالية جديدة + 5m/1m + ticker جداد — زي السكان الحقيقي
+    live = {interval: list(klines) for interval, klines in series.items()}
+    variants = {interval: live_variants(klines[-1]) for interval, klines in series.items()}
+    tickers = [
+        {"quoteVolume": str(25_000_000 + i * 1_000), "priceChangePercent": str(4.2 + i * 0.01)}
+        for i in range(LIVE_VARIANTS)
+    ]
+    turn = [0]
+
+    def warm():
+        i = turn[0] = (turn[0] + 1) % LIVE_VARIANTS
+        for interval, klines in live.items():
+            klines[-1] = variants[interval][i]
+        stub_client(live, tickers[i])
+        return scanner_logic.build_signal("BENCHUSDT")
+
+    return {
+        f"build_signal_cold/{label}": cold,
+        f"build_signal_memo/{label}": warm,
+    }
+
+
+def output_cases(log_path: str) -> Dict[str, Callable]:
+    sig = {
+        "symbol": "BENCHUSDT", "price": 1.2345, "quote_volume_24h": 25_000_000.0,
+        "change_24h": 4.2, "rsi_now": 55.0, "rsi_min": 35.0, "rsi_1h": 60.0,
+        "grade": "🔥 Strong", "score": 8, "side": "BUY",
+        "reasons": ["Main 15m spike x3.40", "Breakout 15m", "1h uptrend (EMA20 > EMA50 & price above EMA20)"],
+        "vol_1m": 1200.0, "vol_5m": 5400.0, "vol_15m": 18000.0, "vol_60m": 64000.0,
+        "net_vol_1m": 800.0, "net_vol_15": 9000.0, "net_vol_60": 21000.0,
+        "net_flow": {1: 15000.0, 5: 42000.0, 15: 90000.0, 60: 150000.0},
+        "ping_count": 2,
+    }
+    main.LOG_FILE = log_path
+
+    def reset_log():
+        # كل عينة بتبدأ من log فاضي وفهرس فاضي — الشغل المتقاس ما يكبرش مع الوقت
+        open(log_path, "w").close()
+        signal_index.clear()
+
+    return {
+        "format_msg": lambda: main.format_msg(sig),
+        "log_signal": (lambda: main.log_signal(sig), reset_log),
+    }
+
+
+def all_cases(recorded: List[str], log_path: str) -> Dict[str, Callable]:
+    """لازم جوه offline()."""
+    cases: Dict[str, Callable] = {}
+    for n in SIZES:
+        cases.update(indicator_cases(f"{n}", synthetic_klines(n)))
+        series = {interval: synthetic_klines(n, interval) for interval in INTERVALS}
+        cases.update(signal_cases(f"{n}", series))
+
+    for symbol in recorded:
+        series = recorded_klines(symbol)
+        if set(series) != set(INTERVALS):
+            print(f"⚠️ {symbol}: not enough archived candles, skipping")
+            continue
+        cases.update(indicator_cases(f"rec-{symbol}", series["15m"]))
+        cases.update(signal_cases(f"rec-{symbol}", series))
+
+    cases.update(output_cases(log_path))
+    return cases
+
+
+# ===============================
+#  Baselines
+# ===============================
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: Dict[str, float], calib: float) -> None:
+    data = {
+        "python": sys.version.split()[0],
+        "calibration_s": calib,
+        "tolerance": DEFAULT_TOLERANCE,
+        "results": {name: {"seconds": t, "relative": t / calib} for name, t in sorted(results.items())},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def is_regression(t: float, expected: float, tolerance: float) -> bool:
+    noise = max(NOISE_FLOOR_SECONDS, NOISE_FLOOR_RATIO * expected)
+    return t > expected * (1 + tolerance) and t - expected > noise
+
+
+def find_regressions(results: Dict[str, float], calib: float, baseline: Dict, tolerance: float) -> List[str]:
+    base_results = baseline.get("results", {})
+    return [
+        name for name, t in results.items()
+        if name in base_results and is_regression(t, base_results[name]["relative"] * calib, tolerance)
+    ]
+
+
+def confirm(suspects: List[str], recorded: List[str], baseline: Dict, tolerance: float) -> List[str]:
+    """
+    إعادة قياس المشكوك فيهم CONFIRM_ROUNDS مرة (كل مرة بالـ calibration بتاعها) —
+    regression بس لو فشل في أغلب المرات.
+    """
+    failures = dict.fromkeys(suspects, 0)
+    with offline(), tempfile.TemporaryDirectory() as tmp:
+        cases = all_cases(recorded, os.path.join(tmp, "signals_log.csv"))
+        for _ in range(CONFIRM_ROUNDS):
+            retry = run_rounds({name: cases[name] for name in suspects})
+            calib = retry.pop(CALIBRATION)
+            for name in find_regressions(retry, calib, baseline, tolerance):
+                failures[name] += 1
+    return [name for name, n in failures.items() if n > CONFIRM_ROUNDS // 2]
+
+
+def compare(results: Dict[str, float], calib: float, baseline: Dict, tolerance: float,
+            confirmed: List[str]) -> None:
+    base_results = baseline.get("results", {})
+    print(f"{'benchmark':<36}{'time':>12}{'baseline':>12}{'ratio':>8}")
+    for name, t in results.items():
+        base = base_results.get(name)
+        if base is None:
+            print(f"{name:<36}{t * 1e6:>10.1f}µs{'-':>12}{'new':>8}")
+            continue
+        expected = base["relative"] * calib
+        ratio = t / expected
+        flag = ""
+        if name in confirmed:
+            flag = "  ❌ REGRESSION"
+        elif is_regression(t, expected, tolerance):
+            flag = "  (noise, not confirmed)"
+        print(f"{name:<36}{t * 1e6:>10.1f}µs{expected * 1e6:>10.1f}µs{ratio:>7.2f}x{flag}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for scanner_logic.")
+    parser.add_argument("--update", action="store_true", help="write the current run as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help=f"allowed slowdown ratio (default: baseline's or {DEFAULT_TOLERANCE})")
+    parser.add_argument("--recorded", nargs="*", default=[], metavar="SYMBOL",
+                        help="also benchmark archived candles of these symbols")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with offline(), tempfile.TemporaryDirectory() as tmp:
+        cases = all_cases(args.recorded, os.path.join(tmp, "signals_log.csv"))
+        cases = {name: fn for name, fn in cases.items() if args.filter in name}
+        results = run_rounds(cases)
+        calib = results.pop(CALIBRATION)
+
+    baseline = load_baseline(args.baseline)
+    if args.update or not baseline:
+        if baseline and args.filter:
+            # تحديث جزئي: نحافظ على باقي الـ baseline (بعد تحويله لنفس الـ calibration)
+            old = {name: r["relative"] * calib for name, r in baseline.get("results", {}).items()}
+            results = dict(old, **results)
+        save_baseline(args.baseline, results, calib)
+        print(f"Baseline written to {args.baseline} ({len(results)} benchmarks, "
+              f"{time.perf_counter() - started:.1f}s)")
+        return 0
+
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", DEFAULT_TOLERANCE)
+    suspects = find_regressions(results, calib, baseline, tolerance)
+    # تأكيد: نعيد قياس المشكوك فيهم بس قبل ما نعتبرها regression
+    regressions = confirm(suspects, args.recorded, baseline, tolerance) if suspects else []
+    compare(results, calib, baseline, tolerance, regressions)
+    print(f"\n{len(results)} benchmarks in {time.perf_counter() - started:.1f}s, "
+          f"tolerance {tolerance:.0%}")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
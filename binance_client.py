@@ -1,8 +1,29 @@
 # binance_client.py
 
+import logging
+import threading
+import time
+
 import requests
-from typing import List, Dict
-from config import BINANCE_BASE_URL
+from typing import List, Dict, Tuple, Optional
+from config import BINANCE_BASE_URL, SYMBOLS_REFRESH_SECONDS, CANDLE_ARCHIVE_ENABLED
+
+# مدة كل فريم بالمللي ثانية (لحساب عدد الشموع الناقصة)
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+
+# { (symbol, interval): [kline, ...] } — آخر شموع معروفة لكل رمز وفريم
+_kline_cache: Dict[Tuple[str, str], List[Dict]] = {}
+_symbols_cache = {"symbols": [], "fetched_at": 0.0}
+_cache_lock = threading.Lock()
 
 
 def get_usdt_symbols() -> List[str]:
@@ -21,6 +42,23 @@ def get_usdt_symbols() -> List[str]:
     return symbols
 
 
+def get_usdt_symbols_cached(max_age: float = SYMBOLS_REFRESH_SECONDS) -> List[str]:
+    """
+    نفس get_usdt_symbols بس ما بيطلبش exchangeInfo غير لو القائمة أقدم من max_age.
+    """
+    with _cache_lock:
+        symbols = _symbols_cache["symbols"]
+        fetched_at = _symbols_cache["fetched_at"]
+    if symbols and time.time() - fetched_at < max_age:
+        return list(symbols)
+
+    symbols = get_usdt_symbols()
+    with _cache_lock:
+        _symbols_cache["symbols"] = symbols
+        _symbols_cache["fetched_at"] = time.time()
+    return list(symbols)
+
+
 def get_klines(symbol: str, interval: str, limit: int) -> List[Dict]:
     """
     يرجّع شموع لرمز معيّن.
@@ -49,6 +87,92 @@ def get_klines(symbol: str, interval: str, limit: int) -> List[Dict]:
     return klines
 
 
+def get_klines_cached(symbol: str, interval: str, limit: int) -> List[Dict]:
+    """
+    نفس get_klines بس بيحتفظ بالشموع في الذاكرة،
+    وكل مرة بيجيب بس الشموع الجديدة + آخر شمعتين (اللي ممكن تكون اتقفلت أو اتحدثت).
+    """
+    key = (symbol, interval)
+    step = INTERVAL_MS.get(interval)
+    with _cache_lock:
+        cached = _kline_cache.get(key)
+
+    if CANDLE_ARCHIVE_ENABLED:
+        # numpy بيتحمل هنا بس (مش وقت import main) علشان الـ startup يبقى أسرع
+        import candle_archive
+
+    # أول مرة للرمز ده (مفيش snapshot) → نبدأ من الأرشيف على الديسك،
+    # بس لو آخر فترة متصلة فيه (من غير فجوات) فيها limit شمعة على الأقل
+    if cached is None and step and CANDLE_ARCHIVE_ENABLED:
+        try:
+            ranges = candle_archive.time_ranges(symbol, interval)
+            if ranges and (ranges[-1][1] - ranges[-1][0]) // step + 1 >= limit:
+                cached = candle_archive.to_klines(candle_archive.tail(symbol, interval, limit))
+        except Exception as e:
+            logging.error(f"Error reading candle archive for {symbol} {interval}: {e}")
+
+    fetch_limit = limit
+    if cached and step and len(cached) >= limit:
+        now_ms = int(time.time() * 1000)
+        missing = max(0, (now_ms - cached[-1]["open_time"]) // step)
+        fetch_limit = min(limit, missing + 2)
+
+    fresh = get_klines(symbol, interval, fetch_limit)
+    if fetch_limit < limit and fresh:
+        first_open = fresh[0]["open_time"]
+        merged = [k for k in cached if k["open_time"] < first_open] + fresh
+    else:
+        merged = fresh
+    merged = merged[-limit:]
+
+    with _cache_lock:
+        _kline_cache[key] = merged
+
+    if CANDLE_ARCHIVE_ENABLED:
+        try:
+            candle_archive.append_closed(symbol, interval, fresh)
+        except Exception as e:
+            logging.error(f"Error archiving candles for {symbol} {interval}: {e}")
+    return merged
+
+
+def export_cache_state() -> Dict:
+    """
+    نسخة من الكاش (شموع + قائمة الرموز) علشان تتحفظ في الـ snapshot.
+    """
+    with _cache_lock:
+        return {
+            "klines": {key: list(kl) for key, kl in _kline_cache.items()},
+            "symbols": list(_symbols_cache["symbols"]),
+            "symbols_fetched_at": _symbols_cache["fetched_at"],
+        }
+
+
+def restore_cache_state(state: Dict) -> None:
+    """
+    استرجاع الكاش من snapshot قديم — الفرق بيتجاب بعدين من get_klines_cached.
+    """
+    with _cache_lock:
+        _kline_cache.update(state.get("klines", {}))
+        symbols: Optional[List[str]] = state.get("symbols")
+        if symbols:
+            _symbols_cache["symbols"] = list(symbols)
+            _symbols_cache["fetched_at"] = float(state.get("symbols_fetched_at", 0.0))
+
+
+def get_agg_trades(symbol: str, from_id: Optional[int] = None, limit: int = 1000) -> List[Dict]:
+    """
+    صفقات aggTrade — من from_id لو محدد، وإلا آخر limit صفقة.
+    """
+    url = f"{BINANCE_BASE_URL}/api/v3/aggTrades"
+    params = {"symbol": symbol, "limit": limit}
+    if from_id is not None:
+        params["fromId"] = from_id
+    resp = requests.get(url, params=params, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
 def get_24h_ticker(symbol: str) -> Dict:
     """
     بيانات 24 ساعة (منها الحجم).
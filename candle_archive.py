@@ -0,0 +1,244 @@
+# candle_archive.py
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import CANDLE_ARCHIVE_DIR, ARCHIVE_MAX_OPEN_MAPS
+
+# سجل ثابت الطول لكل شمعة (56 byte) — نفس ترتيب حقول get_klines
+RECORD_DTYPE = np.dtype([
+    ("open_time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("close_time", "<i8"),
+])
+
+INDEX_FILE = "index.json"
+
+# { "BTCUSDT_15m": {"step": ms, "count": n, "ranges": [[first_open, last_open, first_row], ...]} }
+_index: Dict[str, Dict] = {}
+_index_loaded = False
+_index_dirty = False
+
+# { key: (memmap, count) } — أقصى عدد ملفات مفتوحة ARCHIVE_MAX_OPEN_MAPS
+_maps: "OrderedDict[str, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _key(symbol: str, interval: str) -> str:
+    return f"{symbol}_{interval}"
+
+
+def _path(key: str) -> str:
+    return os.path.join(CANDLE_ARCHIVE_DIR, f"{key}.bin")
+
+
+# ===============================
+#  Time-range index
+# ===============================
+def _load_index():
+    global _index_loaded
+    if _index_loaded:
+        return
+    _index_loaded = True
+    path = os.path.join(CANDLE_ARCHIVE_DIR, INDEX_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _index.update(json.load(f))
+        except Exception as e:
+            logging.error(f"Error reading candle archive index: {e}")
+
+
+def _rebuild_entry(key: str, count: int) -> Dict:
+    """إعادة بناء الـ ranges من الملف نفسه (لو الـ index ناقص أو قديم)."""
+    mm = np.memmap(_path(key), dtype=RECORD_DTYPE, mode="r", shape=(count,))
+    opens = np.asarray(mm["open_time"])
+    steps = np.asarray(mm["close_time"]) - opens + 1
+    step = int(steps[0])
+
+    breaks = np.nonzero(np.diff(opens) != step)[0] + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [count])) - 1
+    ranges = [[int(opens[s]), int(opens[e]), int(s)] for s, e in zip(starts, ends)]
+    return {"step": step, "count": count, "ranges": ranges}
+
+
+def _entry(key: str) -> Optional[Dict]:
+    """الـ index entry للرمز/الفريم — متزامن مع حجم الملف."""
+    global _index_dirty
+    _load_index()
+    path = _path(key)
+    count = os.path.getsize(path) // RECORD_DTYPE.itemsize if os.path.exists(path) else 0
+    entry = _index.get(key)
+    if count == 0:
+        return None
+    if entry is None or entry["count"] != count:
+        entry = _rebuild_entry(key, count)
+        _index[key] = entry
+        _index_dirty = True
+    return entry
+
+
+def flush_index():
+    """كتابة الـ index على الديسك (مرة واحدة آخر كل سكان)."""
+    global _index_dirty
+    with _lock:
+        if not _index_dirty:
+            return
+        try:
+            os.makedirs(CANDLE_ARCHIVE_DIR, exist_ok=True)
+            path = os.path.join(CANDLE_ARCHIVE_DIR, INDEX_FILE)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(_index, f)
+            os.replace(tmp_path, path)
+            _index_dirty = False
+        except Exception as e:
+            logging.error(f"Error writing candle archive index: {e}")
+
+
+# ===============================
+#  Append
+# ===============================
+def append_closed(symbol: str, interval: str, klines: List[Dict], now_ms: Optional[int] = None) -> int:
+    """
+    إضافة الشموع المقفولة بس (close_time < الآن) اللي لسه مش في الأرشيف.
+    يرجّع عدد الشموع اللي اتضافت.
+    """
+    global _index_dirty
+    if not klines:
+        return 0
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+
+    key = _key(symbol, interval)
+    with _lock:
+        entry = _entry(key)
+        last_open = entry["ranges"][-1][1] if entry else -1
+
+        new = [k for k in klines if k["close_time"] < now_ms and k["open_time"] > last_open]
+        if not new:
+            return 0
+
+        records = np.array(
+            [(k["open_time"], k["open"], k["high"], k["low"], k["close"], k["volume"], k["close_time"])
+             for k in new],
+            dtype=RECORD_DTYPE,
+        )
+        os.makedirs(CANDLE_ARCHIVE_DIR, exist_ok=True)
+        path = _path(key)
+        # لو آخر كتابة اتقطعت في النص (الـ Repl وقع) نشيل البايتات الزيادة قبل ما نضيف
+        size = (entry["count"] if entry else 0) * RECORD_DTYPE.itemsize
+        if os.path.exists(path) and os.path.getsize(path) != size:
+            os.truncate(path, size)
+        with open(path, "ab") as f:
+            f.write(records.tobytes())
+
+        if entry is None:
+            entry = {"step": int(new[0]["close_time"] - new[0]["open_time"] + 1), "count": 0, "ranges": []}
+        step = entry["step"]
+        ranges = entry["ranges"]
+        row = entry["count"]
+        for k in new:
+            if ranges and k["open_time"] == ranges[-1][1] + step:
+                ranges[-1][1] = k["open_time"]
+            else:
+                ranges.append([k["open_time"], k["open_time"], row])
+            row += 1
+        entry["count"] = row
+        _index[key] = entry
+        _index_dirty = True
+        return len(new)
+
+
+# ===============================
+#  Zero-copy reads
+# ===============================
+def _memmap(key: str, count: int) -> np.ndarray:
+    cached = _maps.get(key)
+    if cached is not None and cached[1] == count:
+        _maps.move_to_end(key)
+        return cached[0]
+
+    mm = np.memmap(_path(key), dtype=RECORD_DTYPE, mode="r", shape=(count,))
+    _maps[key] = (mm, count)
+    _maps.move_to_end(key)
+    while len(_maps) > ARCHIVE_MAX_OPEN_MAPS:
+        _maps.popitem(last=False)
+    return mm
+
+
+def _row_for(entry: Dict, t: int) -> int:
+    """أول صف open_time بتاعه >= t — محسوب من الـ ranges من غير ما نلمس الداتا."""
+    ranges = entry["ranges"]
+    step = entry["step"]
+    i = bisect_right([r[0] for r in ranges], t) - 1
+    if i < 0:
+        return 0
+    first_open, last_open, first_row = ranges[i]
+    if t > last_open:
+        return first_row + (last_open - first_open) // step + 1
+    return first_row + -(-(t - first_open) // step)
+
+
+def read_range(symbol: str, interval: str, start_ms: Optional[int] = None,
+               end_ms: Optional[int] = None) -> np.ndarray:
+    """
+    الشموع اللي open_time بتاعها في [start_ms, end_ms) — view على الـ memmap (zero-copy).
+    """
+    key = _key(symbol, interval)
+    with _lock:
+        entry = _entry(key)
+        if entry is None:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        lo = _row_for(entry, start_ms) if start_ms is not None else 0
+        hi = _row_for(entry, end_ms) if end_ms is not None else entry["count"]
+        return _memmap(key, entry["count"])[lo:hi]
+
+
+def tail(symbol: str, interval: str, n: int) -> np.ndarray:
+    """آخر n شمعة في الأرشيف (view)."""
+    if n <= 0:
+        # mm[-0:] = الأرشيف كله
+        return np.empty(0, dtype=RECORD_DTYPE)
+    key = _key(symbol, interval)
+    with _lock:
+        entry = _entry(key)
+        if entry is None:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return _memmap(key, entry["count"])[-n:]
+
+
+def time_ranges(symbol: str, interval: str) -> List[List[int]]:
+    """الفترات المتصلة المتاحة في الأرشيف: [[first_open, last_open], ...]."""
+    with _lock:
+        entry = _entry(_key(symbol, interval))
+        return [[r[0], r[1]] for r in entry["ranges"]] if entry else []
+
+
+def to_klines(records: np.ndarray) -> List[Dict]:
+    """تحويل سجلات الأرشيف لنفس شكل get_klines."""
+    return [
+        {
+            "open_time": int(r["open_time"]),
+            "open": float(r["open"]),
+            "high": float(r["high"]),
+            "low": float(r["low"]),
+            "close": float(r["close"]),
+            "volume": float(r["volume"]),
+            "close_time": int(r["close_time"]),
+        }
+        for r in records
+    ]
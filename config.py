@@ -66,14 +66,55 @@ MAX_TREND_EXTENSION = 0.08   # 8%
 NET_VOLUME_WINDOW_15 = 4   # آخر 4 شمعات 15m ≈ ساعة
 NET_VOLUME_WINDOW_60 = 4   # آخر 4 شمعات 1h ≈ 4 ساعات
 
+# ======================
+# Taker Net Flow (aggTrades)
+# ======================
+# net flow = حجم الشراء (taker buy) - حجم البيع (taker sell) بالـ USDT
+NET_FLOW_ENABLED = True
+NET_FLOW_WINDOWS_MINUTES = (1, 5, 15, 60)
+NET_FLOW_BUCKET_SECONDS = 5       # دقة الـ ring buffer
+NET_FLOW_MAX_SYMBOLS = 400        # أقصى عدد رموز في الذاكرة (الأقدم استخدامًا بيتشال)
+NET_FLOW_MAX_PAGES = 3            # أقصى عدد صفحات aggTrades (1000 صفقة) لكل رمز في كل سكان
+NET_FLOW_LAG_RETRY_SECONDS = 3600 # رمز أسرع من الـ page budget → candle net volume لمدة ساعة قبل ما نجرب تاني
+
+# ======================
+# Memoization (per-symbol stage results)
+# ======================
+MEMO_MAX_ENTRIES = 2000           # أقصى عدد رموز في كل stage (LRU)
+
 # ======================
 # Scanner Interval
 # ======================
 SCAN_INTERVAL_SECONDS = 300       # run every 5 min
 MIN_ALERT_INTERVAL_MINUTES = 60   # لا يرسل نفس العملة مرتين في ساعة
+SYMBOLS_REFRESH_SECONDS = 3600    # تحديث قائمة الرموز (exchangeInfo) كل ساعة
+
+# ======================
+# Warm-start snapshots
+# ======================
+SNAPSHOT_FILE = "state_snapshot.bin"
+SNAPSHOT_INTERVAL_SECONDS = 900   # حفظ snapshot كل 15 دقيقة
+
+# ======================
+# Candle archive (memory-mapped, append-only)
+# ======================
+CANDLE_ARCHIVE_ENABLED = True
+CANDLE_ARCHIVE_DIR = "candle_archive"
+ARCHIVE_MAX_OPEN_MAPS = 128       # أقصى عدد ملفات memmap مفتوحة في نفس الوقت
+
+# ======================
+# Keep-alive / scan snapshot API
+# ======================
+WEB_SERVER = os.getenv("WEB_SERVER", "flask")   # "flask" (dev server) أو "waitress" (production)
+WEB_THREADS = 4                   # عدد threads لـ waitress
+NEAR_MISS_MIN_SCORE = 4           # الـ leaderboard: عملات score 4–5 قريبة من الإشارة
+NEAR_MISS_MAX_SCORE = 5
+LEADERBOARD_SIZE = 20
 
 # ======================
 # Telegram
 # ======================
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")  # ممكن تتغير لسيرفر تجريبي محلي
+TELEGRAM_POLL_TIMEOUT = 30        # long polling (getUpdates) بالثواني
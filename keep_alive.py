@@ -1,18 +1,46 @@
 # keep_alive.py
 
-from flask import Flask
+import logging
 import threading
 
-app = Flask(__name__)
+import scan_view
+from config import WEB_SERVER, WEB_THREADS
 
 
-@app.route("/")
 def home():
     return "🚀 Crypto scanner is running!"
 
 
+def json_view(name: str):
+    """
+    يرجّع آخر snapshot جاهز (bytes + ETag) — لو الـ ETag زي اللي عند العميل → 304 من غير body.
+    """
+    from flask import Response, request
+
+    body, etag = scan_view.current(name)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if scan_view.is_not_modified(etag, request.headers.get("If-None-Match")):
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype="application/json", headers=headers)
+
+
 def run():
+    # Flask بيتعمله import هنا بس (مش وقت تحميل main) علشان الـ startup يبقى أسرع
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.add_url_rule("/", "home", home)
+    app.add_url_rule("/scan", "scan", lambda: json_view("scan"))
+    app.add_url_rule("/scan/leaderboard", "leaderboard", lambda: json_view("leaderboard"))
+
     # Replit بيفتح السيرفر على 0.0.0.0:8080
+    if WEB_SERVER == "waitress":
+        try:
+            from waitress import serve
+            serve(app, host="0.0.0.0", port=8080, threads=WEB_THREADS)
+            return
+        except ImportError:
+            logging.error("waitress is not installed, falling back to the Flask dev server")
     app.run(host="0.0.0.0", port=8080)
 
 
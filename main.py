@@ -3,15 +3,23 @@ import logging
 import csv
 import os
 from datetime import datetime, timedelta
+from typing import Optional
 
-from scanner_logic import build_signal
-from binance_client import get_usdt_symbols
+from scanner_logic import evaluate_symbol
+from binance_client import get_usdt_symbols_cached
 from telegram_bot import send_alert
 from keep_alive import keep_alive
+from snapshot import save_snapshot, load_snapshot
+from telegram_commands import start_command_listener
+import signal_index
+import scan_view
+import memo
 
 from config import (
     SCAN_INTERVAL_SECONDS,
     MIN_ALERT_INTERVAL_MINUTES,
+    SNAPSHOT_INTERVAL_SECONDS,
+    CANDLE_ARCHIVE_ENABLED,
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -25,35 +33,38 @@ LOG_FILE = "signals_log.csv"
 # ===============================
 #  Log file helpers
 # ===============================
+LOG_FIELDS = [
+    "timestamp_utc",
+    "symbol",
+    "side",
+    "grade",
+    "score",
+    "price",
+    "rsi_15m",
+    "rsi_1h",
+    "change_24h_percent",
+    "quote_volume_24h",
+    "vol_1m",
+    "vol_5m",
+    "vol_15m",
+    "vol_60m",
+    "net_vol_1m",
+    "net_vol_15m",
+    "net_vol_60m",
+    "ping_count_24h",
+]
+
+
 def init_log_file():
     """إنشاء ملف CSV مع الهيدر لو مش موجود."""
     if not os.path.exists(LOG_FILE):
         with open(LOG_FILE, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow([
-                "timestamp_utc",
-                "symbol",
-                "side",
-                "grade",
-                "score",
-                "price",
-                "rsi_15m",
-                "rsi_1h",
-                "change_24h_percent",
-                "quote_volume_24h",
-                "vol_1m",
-                "vol_5m",
-                "vol_15m",
-                "vol_60m",
-                "net_vol_1m",
-                "net_vol_15m",
-                "net_vol_60m",
-                "ping_count_24h",
-            ])
+            writer.writerow(LOG_FIELDS)
 
 
 def log_signal(sig: dict):
-    """تسجيل الإشارة في ملف CSV."""
+    """تسجيل الإشارة في ملف CSV + الفهرس اللي في الذاكرة (لأوامر تليجرام)."""
     try:
         timestamp = datetime.utcnow().isoformat()
         sym = sig.get("symbol", "")
@@ -77,28 +88,31 @@ def log_signal(sig: dict):
 
         ping_count = sig.get("ping_count", 0)
 
+        row = [
+            timestamp,
+            sym,
+            side,
+            grade,
+            score,
+            price,
+            rsi_15m,
+            rsi_1h,
+            change_24h,
+            qv_24h,
+            vol_1m,
+            vol_5m,
+            vol_15m,
+            vol_60m,
+            net_vol_1m,
+            net_vol_15,
+            net_vol_60,
+            ping_count,
+        ]
         with open(LOG_FILE, "a", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow([
-                timestamp,
-                sym,
-                side,
-                grade,
-                score,
-                price,
-                rsi_15m,
-                rsi_1h,
-                change_24h,
-                qv_24h,
-                vol_1m,
-                vol_5m,
-                vol_15m,
-                vol_60m,
-                net_vol_1m,
-                net_vol_15,
-                net_vol_60,
-                ping_count,
-            ])
+            writer.writerow(row)
+
+        signal_index.add_signal(dict(zip(LOG_FIELDS, row)))
     except Exception as e:
         logging.error(f"Error logging signal: {e}")
 
@@ -192,6 +206,13 @@ def format_msg(sig):
     net_vol_60 = sig.get("net_vol_60", 0.0)
     ping_count = sig.get("ping_count", 0)
 
+    flows = sig.get("net_flow", {})
+    if flows:
+        flow_vals = " / ".join(f"{m}m `{v:,.0f}`" for m, v in sorted(flows.items()))
+        flow_line = f"💧 *Net Flow (USDT):* {flow_vals}\n"
+    else:
+        flow_line = ""
+
     reasons = "\n".join([f"• {r}" for r in sig["reasons"]])
 
     separator = "━━━━━━━━━━━━━━━━━━━━"
@@ -211,7 +232,8 @@ def format_msg(sig):
         f"📌 *Pings (24h):* `{ping_count}`\n\n"
         f"🔊 *Vol 1m / 5m / 15m / 60m:*\n"
         f"`{vol_1m:,.0f}` / `{vol_5m:,.0f}` / `{vol_15m:,.0f}` / `{vol_60m:,.0f}`\n"
-        f"📈 *Net Vol 15m / 60m:* `{net_vol_15:,.0f}` / `{net_vol_60:,.0f}`\n\n"
+        f"📈 *Net Vol 15m / 60m:* `{net_vol_15:,.0f}` / `{net_vol_60:,.0f}`\n"
+        f"{flow_line}\n"
         f"*Reasons:*\n{reasons}\n\n"
         f"[فتح الشارت على TradingView](https://www.tradingview.com/chart/?symbol=BINANCE:{sym})"
     )
@@ -222,14 +244,26 @@ def format_msg(sig):
 # ===============================
 #  Main loop
 # ===============================
-def main_loop():
+def main_loop(started_at: Optional[float] = None, warm_start: bool = False):
+    """
+    started_at: وقت بداية البرنامج (time.monotonic) — لحساب زمن أول سكان كامل.
+    """
+    if started_at is None:
+        started_at = time.monotonic()
+    first_scan = True
+    last_snapshot = None
+
     while True:
         logging.info("Starting scan...")
-        symbols = get_usdt_symbols()
+        scan_started = datetime.utcnow()
+        summaries = []
+        symbols = get_usdt_symbols_cached()
 
         for sym in symbols:
             try:
-                sig = build_signal(sym)
+                result = evaluate_symbol(sym)
+                summaries.append(scan_view.summarize(result))
+                sig = result["signal"]
                 if not sig:
                     continue
 
@@ -239,7 +273,8 @@ def main_loop():
                     continue
 
                 # حساب الـ Ping لكل عملة بناءً على net_vol_1m و 24h volume
-                net_vol_1m = sig.get("net_vol_1m", 0.0)
+                # (net flow الحقيقي آخر دقيقة من aggTrades لو متاح)
+                net_vol_1m = sig.get("net_flow", {}).get(1, sig.get("net_vol_1m", 0.0))
                 qv_24h = sig.get("quote_volume_24h", 0.0)
                 ping_count = update_ping(sym, net_vol_1m, qv_24h)
                 sig["ping_count"] = ping_count
@@ -256,13 +291,42 @@ def main_loop():
 
             except Exception as e:
                 logging.error(f"Error processing {sym}: {e}")
+                summaries.append({
+                    "symbol": sym, "score": 0, "passed": [], "failed": [],
+                    "rejection": f"Error: {e}", "grade": None,
+                })
+
+        # الـ snapshot الجديد للـ /scan API (تبديل ذرّي)
+        scan_view.publish(summaries, scan_started, datetime.utcnow(), memo.stats())
+        logging.info(f"[MEMO] {memo.format_stats()}")
+
+        if first_scan:
+            first_scan = False
+            elapsed = time.monotonic() - started_at
+            start_kind = "warm" if warm_start else "cold"
+            logging.info(f"[STARTUP] first complete scan in {elapsed:.1f}s ({start_kind} start)")
+            send_alert(
+                "🚀 *Advanced Crypto Scanner* is now running on Replit\n"
+                f"⏱ First scan: `{elapsed:.1f}s` ({start_kind} start)"
+            )
+
+        if CANDLE_ARCHIVE_ENABLED:
+            from candle_archive import flush_index
+            flush_index()
+
+        if last_snapshot is None or time.monotonic() - last_snapshot >= SNAPSHOT_INTERVAL_SECONDS:
+            save_snapshot(last_alert_times, ping_state)
+            last_snapshot = time.monotonic()
 
         logging.info("Scan finished. Sleeping...")
         time.sleep(SCAN_INTERVAL_SECONDS)
 
 
 if __name__ == "__main__":
+    started_at = time.monotonic()
     init_log_file()
+    signal_index.load_csv(LOG_FILE)
+    warm_start = load_snapshot(last_alert_times, ping_state)
     keep_alive()
-    send_alert("🚀 *Advanced Crypto Scanner* is now running on Replit")
-    main_loop()
+    start_command_listener()
+    main_loop(started_at, warm_start)
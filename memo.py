@@ -0,0 +1,103 @@
+# memo.py
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+from config import MEMO_MAX_ENTRIES
+
+
+class StageMemo:
+    """
+    كاش لمرحلة حساب واحدة: { key (الرمز): (fingerprint, value) }.
+    لو الـ fingerprint اتغير → نحسب من جديد. LRU بحد أقصى max_entries.
+    """
+
+    def __init__(self, name: str, max_entries: int = MEMO_MAX_ENTRIES):
+        self.name = name
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, key: Hashable, fingerprint: Hashable):
+        """القيمة المتخزنة لو الـ fingerprint زي ما هو، وإلا None (بتتحسب miss)."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def store(self, key: Hashable, fingerprint: Hashable, value) -> None:
+        with self.lock:
+            self.entries[key] = (fingerprint, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, fingerprint: Hashable, compute: Callable):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        self.store(key, fingerprint, value)
+        return value
+
+    def stats(self) -> Dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "size": len(self.entries),
+                "evictions": self.evictions,
+            }
+
+
+_stages: Dict[str, StageMemo] = {}
+_stages_lock = threading.Lock()
+
+
+def stage(name: str) -> StageMemo:
+    with _stages_lock:
+        memo = _stages.get(name)
+        if memo is None:
+            memo = StageMemo(name)
+            _stages[name] = memo
+        return memo
+
+
+def memoize(name: str, key: Hashable, fingerprint: Hashable, compute: Callable):
+    return stage(name).get_or_compute(key, fingerprint, compute)
+
+
+def stats() -> Dict[str, Dict]:
+    with _stages_lock:
+        stages = list(_stages.values())
+    return {m.name: m.stats() for m in stages}
+
+
+def format_stats() -> str:
+    """سطر واحد للـ log: stage hit% (hits/total)."""
+    return " | ".join(
+        f"{name} {s['hit_ratio'] * 100:.0f}% ({s['hits']}/{s['hits'] + s['misses']})"
+        for name, s in sorted(stats().items())
+    )
+
+
+def clear() -> None:
+    """مسح كل الـ stages (للـ benchmarks / إعادة التشغيل)."""
+    with _stages_lock:
+        _stages.clear()
@@ -0,0 +1,211 @@
+# net_flow.py
+
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from binance_client import get_agg_trades
+from config import (
+    NET_FLOW_WINDOWS_MINUTES,
+    NET_FLOW_BUCKET_SECONDS,
+    NET_FLOW_MAX_SYMBOLS,
+    NET_FLOW_MAX_PAGES,
+    NET_FLOW_LAG_RETRY_SECONDS,
+)
+
+AGG_TRADES_PAGE = 1000
+
+
+# ===================================================
+# Ring buffer (taker buy / sell quote volume per bucket)
+# ===================================================
+class FlowRing:
+    """
+    Ring ثابت الحجم: bucket لكل NET_FLOW_BUCKET_SECONDS ثانية لحد أكبر window.
+    مجموع كل window بيتحدث مع كل bucket جديد، فالاستعلام O(1).
+    """
+
+    __slots__ = ("bucket_ms", "size", "windows", "buy", "sell", "sums", "head", "covered_from")
+
+    def __init__(self, bucket_seconds: int, windows_minutes: Iterable[int]):
+        self.bucket_ms = bucket_seconds * 1000
+        self.windows = {m: (m * 60) // bucket_seconds for m in windows_minutes}
+        self.size = max(self.windows.values())
+        self.buy = array("d", bytes(8 * self.size))
+        self.sell = array("d", bytes(8 * self.size))
+        self.sums = {m: [0.0, 0.0] for m in self.windows}  # {minutes: [buy, sell]}
+        self.head = None          # رقم آخر bucket
+        self.covered_from = None  # أول وقت (ms) عندنا داتا متصلة منه
+
+    def _reset(self, bucket: int):
+        for i in range(self.size):
+            self.buy[i] = 0.0
+            self.sell[i] = 0.0
+        for s in self.sums.values():
+            s[0] = s[1] = 0.0
+        self.head = bucket
+
+    def advance(self, now_ms: int):
+        bucket = now_ms // self.bucket_ms
+        if self.head is None:
+            self._reset(bucket)
+            return
+        if bucket <= self.head:
+            return
+        if bucket - self.head >= self.size:
+            self._reset(bucket)
+            return
+
+        for step in range(self.head + 1, bucket + 1):
+            # الـ bucket اللي خرج من كل window
+            for m, wb in self.windows.items():
+                old = (step - wb) % self.size
+                s = self.sums[m]
+                s[0] -= self.buy[old]
+                s[1] -= self.sell[old]
+            idx = step % self.size
+            self.buy[idx] = 0.0
+            self.sell[idx] = 0.0
+            if idx == 0:
+                self._resum(step)
+        self.head = bucket
+
+    def _resum(self, head: int):
+        """
+        إعادة حساب المجاميع من الـ buckets مرة كل لفة كاملة
+        علشان أخطاء الـ float من الطرح المتكرر ما تتراكمش (amortized O(1)).
+        """
+        for m, wb in self.windows.items():
+            buy = sell = 0.0
+            for b in range(head - wb + 1, head + 1):
+                buy += self.buy[b % self.size]
+                sell += self.sell[b % self.size]
+            self.sums[m] = [buy, sell]
+
+    def add(self, ts_ms: int, buy_quote: float, sell_quote: float):
+        self.advance(ts_ms)
+        bucket = ts_ms // self.bucket_ms
+        age = self.head - bucket
+        if age >= self.size:
+            return
+        idx = bucket % self.size
+        self.buy[idx] += buy_quote
+        self.sell[idx] += sell_quote
+        for m, wb in self.windows.items():
+            if age < wb:
+                s = self.sums[m]
+                s[0] += buy_quote
+                s[1] += sell_quote
+        if self.covered_from is None:
+            self.covered_from = ts_ms
+
+    def net(self, minutes: int, now_ms: int) -> float:
+        self.advance(now_ms)
+        buy, sell = self.sums[minutes]
+        return buy - sell
+
+    def is_covered(self, minutes: int, now_ms: int) -> bool:
+        """هل عندنا داتا تغطي الـ window كله؟"""
+        return self.covered_from is not None and now_ms - self.covered_from >= minutes * 60_000
+
+
+# ===================================================
+# Per-symbol state
+# ===================================================
+_rings: "OrderedDict[str, FlowRing]" = OrderedDict()
+_last_ids: Dict[str, int] = {}
+_lagging: Dict[str, float] = {}  # { symbol: وقت ما اتعلم lagging }
+_lock = threading.Lock()
+
+
+def _ring(symbol: str) -> FlowRing:
+    ring = _rings.get(symbol)
+    if ring is None:
+        ring = FlowRing(NET_FLOW_BUCKET_SECONDS, NET_FLOW_WINDOWS_MINUTES)
+        _rings[symbol] = ring
+        while len(_rings) > NET_FLOW_MAX_SYMBOLS:
+            evicted, _ = _rings.popitem(last=False)
+            _last_ids.pop(evicted, None)
+    _rings.move_to_end(symbol)
+    return ring
+
+
+def ingest_trades(symbol: str, trades: Iterable[Dict]) -> int:
+    """
+    إضافة صفقات aggTrade (من REST أو stream) — m=True يعني الـ taker بايع.
+    الصفقات اللي id بتاعها <= آخر id اتضاف بتتجاهل (لو threadين جابوا نفس الصفحة).
+    يرجّع آخر trade id معروف للرمز (أو -1).
+    """
+    with _lock:
+        ring = _ring(symbol)
+        last_id = _last_ids.get(symbol, -1)
+        for t in trades:
+            if t["a"] <= last_id:
+                continue
+            quote = float(t["p"]) * float(t["q"])
+            if t["m"]:
+                ring.add(t["T"], 0.0, quote)
+            else:
+                ring.add(t["T"], quote, 0.0)
+            last_id = t["a"]
+        if last_id >= 0:
+            _last_ids[symbol] = last_id
+    return last_id
+
+
+def poll_symbol(symbol: str) -> None:
+    """
+    جلب الصفقات الجديدة من آخر id معروف (بحد أقصى NET_FLOW_MAX_PAGES صفحة).
+    لو الرمز أسرع من كده (لسه متأخر بعد آخر صفحة) → بيتعلم lagging ويتشال من الذاكرة،
+    وما بيتعملوش polling تاني قبل NET_FLOW_LAG_RETRY_SECONDS (بيرجع لـ net volume من الشموع).
+    """
+    with _lock:
+        flagged_at = _lagging.get(symbol)
+        if flagged_at is not None:
+            if time.time() - flagged_at < NET_FLOW_LAG_RETRY_SECONDS:
+                return
+            del _lagging[symbol]
+        last_id = _last_ids.get(symbol)
+
+    if last_id is None:
+        ingest_trades(symbol, get_agg_trades(symbol, limit=AGG_TRADES_PAGE))
+        return
+
+    for _ in range(NET_FLOW_MAX_PAGES):
+        trades = get_agg_trades(symbol, from_id=last_id + 1, limit=AGG_TRADES_PAGE)
+        if trades:
+            last_id = ingest_trades(symbol, trades)
+        if len(trades) < AGG_TRADES_PAGE:
+            return
+
+    logging.info(f"[NET FLOW] {symbol} trades faster than the REST page budget, "
+                 f"using candle net volume for {NET_FLOW_LAG_RETRY_SECONDS}s")
+    with _lock:
+        _lagging[symbol] = time.time()
+        _rings.pop(symbol, None)
+        _last_ids.pop(symbol, None)
+
+
+def is_lagging(symbol: str) -> bool:
+    with _lock:
+        return symbol in _lagging
+
+
+def net_flows(symbol: str, now_ms: Optional[int] = None) -> Dict[int, float]:
+    """
+    {minutes: net flow USDT} للـ windows المغطاة بالكامل بس.
+    """
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    with _lock:
+        ring = _rings.get(symbol)
+        if ring is None:
+            return {}
+        return {
+            m: ring.net(m, now_ms)
+            for m in NET_FLOW_WINDOWS_MINUTES
+            if ring.is_covered(m, now_ms)
+        }
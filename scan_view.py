@@ -0,0 +1,78 @@
+# scan_view.py
+
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import NEAR_MISS_MIN_SCORE, NEAR_MISS_MAX_SCORE, LEADERBOARD_SIZE
+
+EMPTY_VIEW = (b"{}", '"empty"')
+
+# الرفض الوحيد اللي يخلّي العملة "قريبة": الـ score ناقص (مش RSI عالي / فوليوم ضعيف / error)
+SCORE_REJECTION_RE = re.compile(r"Score -?\d+ below 6")
+
+# { view_name: (json_bytes, etag) } — بيتبدل كله مرة واحدة آخر كل سكان (assignment ذرّي)،
+# فالـ HTTP thread بيقرا نسخة كاملة ثابتة من غير lock ومن غير ما يعطل السكان.
+_views: Dict[str, Tuple[bytes, str]] = {}
+
+
+def summarize(result: Dict) -> Dict:
+    """ملخص تقييم رمز واحد (من evaluate_symbol) للعرض."""
+    sig = result.get("signal")
+    return {
+        "symbol": result["symbol"],
+        "score": result.get("score", 0),
+        "passed": [name for name, ok in result.get("conditions", {}).items() if ok],
+        "failed": [name for name, ok in result.get("conditions", {}).items() if not ok],
+        "rejection": result.get("rejection"),
+        "grade": sig["grade"] if sig else None,
+    }
+
+
+def _encode(data: Dict) -> Tuple[bytes, str]:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def publish(summaries: List[Dict], started_at: datetime, finished_at: datetime,
+            memo_stats: Optional[Dict] = None) -> None:
+    """بناء الـ views من نتيجة السكان وتبديلها مرة واحدة."""
+    near = [
+        s for s in summaries
+        if NEAR_MISS_MIN_SCORE <= s["score"] <= NEAR_MISS_MAX_SCORE
+        and (s["rejection"] is None or SCORE_REJECTION_RE.fullmatch(s["rejection"]))
+    ]
+    # ترتيب ثابت: score ثم عدد الشروط اللي اتحققت ثم الرمز
+    near.sort(key=lambda s: (-s["score"], -len(s["passed"]), s["symbol"]))
+    leaderboard = near[:LEADERBOARD_SIZE]
+
+    meta = {
+        "scan_started_utc": started_at.isoformat(),
+        "scan_finished_utc": finished_at.isoformat(),
+        "duration_s": round((finished_at - started_at).total_seconds(), 2),
+        "symbols_scanned": len(summaries),
+    }
+    full = dict(meta)
+    full["signals"] = [s for s in summaries if s["grade"]]
+    full["leaderboard"] = leaderboard
+    full["symbols"] = {s["symbol"]: s for s in summaries}
+    full["memo"] = memo_stats or {}
+
+    board = dict(meta)
+    board["leaderboard"] = leaderboard
+
+    global _views
+    _views = {"scan": _encode(full), "leaderboard": _encode(board)}
+
+
+def current(name: str) -> Tuple[bytes, str]:
+    return _views.get(name, EMPTY_VIEW)
+
+
+def is_not_modified(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
@@ -1,3 +1,4 @@
+import logging
 from typing import Optional, Dict, List, Tuple
 from statistics import mean
 
@@ -25,9 +26,12 @@ from config import (
     MAX_TREND_EXTENSION,
     NET_VOLUME_WINDOW_15,
     NET_VOLUME_WINDOW_60,
+    NET_FLOW_ENABLED,
 )
 
-from binance_client import get_klines, get_24h_ticker
+from binance_client import get_klines_cached, get_24h_ticker
+from net_flow import poll_symbol, net_flows
+import memo
 
 
 # ===================================================
@@ -43,6 +47,12 @@ def ema(values: List[float], period: int) -> float:
     return ema_val
 
 
+def ema_step(prev: float, value: float, period: int) -> float:
+    """خطوة EMA واحدة — ema_step(ema(values[:-1]), values[-1]) == ema(values) لو len(values) > period."""
+    k = 2 / (period + 1)
+    return (value * k) + (prev * (1 - k))
+
+
 # ===================================================
 # RSI
 # ===================================================
@@ -69,6 +79,15 @@ def rsi(values: List[float], period: int) -> float:
     return 100 - (100 / (1 + rs))
 
 
+def rsi_history(closes: List[float], period: int, lookback: int) -> List[float]:
+    """RSI على كل شمعة من آخر lookback+1 شمعة مقفولة (من غير الشمعة الحالية)."""
+    return [
+        rsi(closes[:-i], period)
+        for i in range(1, lookback + 2)
+        if len(closes) > period + i
+    ]
+
+
 # ===================================================
 # Volume spike
 # ===================================================
@@ -85,12 +104,18 @@ def volume_spike(volumes: List[float], window: int) -> float:
 # ===================================================
 # Breakout check
 # ===================================================
-def is_breakout(highs: List[float], closes: List[float], lookback: int) -> bool:
+def breakout_level(highs: List[float], lookback: int) -> Optional[float]:
+    """أعلى high في آخر lookback شمعة مقفولة (من غير الشمعة الحالية)."""
     if len(highs) < lookback + 2:
+        return None
+    return max(highs[-(lookback + 1):-1])
+
+
+def is_breakout(highs: List[float], closes: List[float], lookback: int) -> bool:
+    prev_high = breakout_level(highs, lookback)
+    if prev_high is None:
         return False
-    last_close = closes[-1]
-    prev_high = max(highs[-(lookback + 1):-1])
-    return last_close > prev_high
+    return closes[-1] > prev_high
 
 
 # ===================================================
@@ -159,21 +184,67 @@ def small_uptrend_score(closes: List[float], lookback: int = 5) -> int:
     return score
 
 
+# ===================================================
+# Fingerprints (memo keys)
+# ===================================================
+def closed_fingerprint(klines: List[Dict]) -> Tuple:
+    """بيتغير بس لما شمعة جديدة تتقفل."""
+    if len(klines) < 2:
+        return (len(klines),)
+    return (len(klines), klines[-2]["open_time"])
+
+
 # ===================================================
 # Main Signal Builder
 # ===================================================
-def build_signal(symbol: str) -> Optional[Dict]:
+def evaluate_symbol(symbol: str) -> Dict:
+    """
+    نفس منطق build_signal بس بيرجّع التقييم كامل حتى لو مفيش إشارة:
+    score + الشروط اللي اتحققت + سبب الرفض (rejection) + الإشارة نفسها (signal أو None).
+    """
     # ---------------------------
     # Liquidity + 24h change
     # ---------------------------
     enough, qv, change_pct = liquidity_and_change(symbol)
     if not enough:
-        return None
+        return {
+            "symbol": symbol,
+            "score": 0,
+            "conditions": {},
+            "reasons": [],
+            "rejection": "Low 24h volume or 24h change out of range",
+            "signal": None,
+        }
 
+    # ---------------------------
+    # Data (كله من الكاش — بيجيب الفرق بس)
+    # ---------------------------
+    m = get_klines_cached(symbol, KLINE_INTERVAL, KLINE_LIMIT)
+    f = get_klines_cached(symbol, FAST_INTERVAL, 40)
+    h = get_klines_cached(symbol, SLOW_INTERVAL, 80)
+    kl_1m = get_klines_cached(symbol, "1m", 20)
+
+    # Taker net flow من aggTrades (USDT) — لو الـ window متغطي بيحل محل تقدير لون الشمعة
+    flows = {}
+    if NET_FLOW_ENABLED:
+        try:
+            poll_symbol(symbol)
+            flows = net_flows(symbol)
+        except Exception as e:
+            logging.error(f"Error updating net flow for {symbol}: {e}")
+
+    return score_symbol(symbol, qv, change_pct, m, f, h, kl_1m, flows)
+
+
+def score_symbol(symbol: str, qv: float, change_pct: float, m: List[Dict], f: List[Dict],
+                 h: List[Dict], kl_1m: List[Dict], flows: Dict[int, float]) -> Dict:
+    """
+    حساب المؤشرات والـ score من الشموع. المراحل اللي بتعتمد على الشموع المقفولة بس
+    (RSI history و breakout على 15m، و EMA على 1h) بتتعاد من الـ memo لو مفيش شمعة جديدة اتقفلت.
+    """
     # ---------------------------
     # Main 15m data
     # ---------------------------
-    m = get_klines(symbol, KLINE_INTERVAL, KLINE_LIMIT)
     closes = [k["close"] for k in m]
     highs = [k["high"] for k in m]
     lows = [k["low"] for k in m]
@@ -181,21 +252,25 @@ def build_signal(symbol: str) -> Optional[Dict]:
 
     last = m[-1]
     last_close = last["close"]
+    fp_15 = closed_fingerprint(m)
 
     # Volume spike 15m
     main_spike = volume_spike(vols_15, MAIN_VOLUME_WINDOW)
     cond_main_spike = main_spike >= MAIN_VOLUME_SPIKE_MULTIPLIER
 
     # Breakout 15m
-    cond_breakout = is_breakout(highs, closes, BREAKOUT_LOOKBACK)
+    prev_high = memo.memoize(
+        "breakout_15m", symbol, fp_15,
+        lambda: breakout_level(highs, BREAKOUT_LOOKBACK),
+    )
+    cond_breakout = prev_high is not None and last_close > prev_high
 
     # RSI logic على 15m
     rsi_now = rsi(closes, RSI_PERIOD)
-    rsi_hist = [
-        rsi(closes[:-i], RSI_PERIOD)
-        for i in range(1, RSI_RECENT_LOOKBACK + 2)
-        if len(closes) > RSI_PERIOD + i
-    ]
+    rsi_hist = memo.memoize(
+        "rsi_15m_hist", symbol, fp_15,
+        lambda: rsi_history(closes, RSI_PERIOD, RSI_RECENT_LOOKBACK),
+    )
     rsi_min_before = min(rsi_hist) if rsi_hist else rsi_now
     cond_rsi = (
         rsi_min_before <= RSI_MIN_BEFORE
@@ -209,7 +284,6 @@ def build_signal(symbol: str) -> Optional[Dict]:
     # ---------------------------
     # 5m fast confirmation
     # ---------------------------
-    f = get_klines(symbol, FAST_INTERVAL, 40)
     vols_5 = [k["volume"] for k in f]
     f_last = f[-1]
 
@@ -222,14 +296,22 @@ def build_signal(symbol: str) -> Optional[Dict]:
     # ---------------------------
     # 1h trend + overextension filters
     # ---------------------------
-    h = get_klines(symbol, SLOW_INTERVAL, 80)
     closes_1h = [k["close"] for k in h]
     vols_60 = [k["volume"] for k in h]
-
-    ema_fast = ema(closes_1h, EMA_FAST_PERIOD)
-    ema_slow = ema(closes_1h, EMA_SLOW_PERIOD)
     last_h_close = closes_1h[-1]
 
+    # EMA على الشموع المقفولة (memo) + خطوة واحدة بسعر الشمعة الحالية
+    if len(closes_1h) > EMA_SLOW_PERIOD:
+        ema_fast_closed, ema_slow_closed = memo.memoize(
+            "ema_1h", symbol, closed_fingerprint(h),
+            lambda: (ema(closes_1h[:-1], EMA_FAST_PERIOD), ema(closes_1h[:-1], EMA_SLOW_PERIOD)),
+        )
+        ema_fast = ema_step(ema_fast_closed, last_h_close, EMA_FAST_PERIOD)
+        ema_slow = ema_step(ema_slow_closed, last_h_close, EMA_SLOW_PERIOD)
+    else:
+        ema_fast = ema(closes_1h, EMA_FAST_PERIOD)
+        ema_slow = ema(closes_1h, EMA_SLOW_PERIOD)
+
     # ترند صاعد أساسي
     cond_trend = ema_fast > ema_slow and last_h_close > ema_fast
 
@@ -244,7 +326,6 @@ def build_signal(symbol: str) -> Optional[Dict]:
     # ---------------------------
     # Extra volumes: 1m + net volumes (15m/60m)
     # ---------------------------
-    kl_1m = get_klines(symbol, "1m", 20)
     if kl_1m:
         last_1m = kl_1m[-1]
         vol_1m_last = last_1m["volume"]
@@ -263,7 +344,7 @@ def build_signal(symbol: str) -> Optional[Dict]:
     net_vol_15 = net_volume(m, NET_VOLUME_WINDOW_15)
     net_vol_60 = net_volume(h, NET_VOLUME_WINDOW_60)
 
-    cond_net_15_pos = net_vol_15 > 0
+    cond_net_15_pos = flows[60] > 0 if 60 in flows else net_vol_15 > 0
     cond_net_60_pos = net_vol_60 > 0
 
     # ---------------------------
@@ -302,25 +383,54 @@ def build_signal(symbol: str) -> Optional[Dict]:
 
     if cond_net_15_pos:
         score += 1
-        reasons.append(f"Net volume 15m window positive ({net_vol_15:.0f})")
+        if 60 in flows:
+            reasons.append(f"Taker net flow 60m positive ({flows[60]:,.0f} USDT)")
+        else:
+            reasons.append(f"Net volume 15m window positive ({net_vol_15:.0f})")
 
     if cond_net_60_pos:
         score += 1
         reasons.append(f"Net volume 60m window positive ({net_vol_60:.0f})")
 
+    conditions = {
+        "main_spike": cond_main_spike,
+        "breakout": cond_breakout,
+        "rsi_rebound": cond_rsi,
+        "fast_spike": cond_fast_spike,
+        "bull_candle": cond_bull,
+        "small_uptrend": cond_small_uptrend,
+        "trend_1h": cond_trend,
+        "net_15_pos": cond_net_15_pos,
+        "net_60_pos": cond_net_60_pos,
+        "rsi_1h_ok": cond_rsi_1h_ok,
+        "not_overextended": cond_not_overextended,
+    }
+    result = {
+        "symbol": symbol,
+        "score": score,
+        "conditions": conditions,
+        "reasons": reasons,
+        "rejection": None,
+        "signal": None,
+    }
+
     # فلاتر حماية قوية
     if not cond_rsi_1h_ok:
-        return None
+        result["rejection"] = f"1h RSI too high ({rsi_1h:.1f})"
+        return result
 
     if not cond_not_overextended:
-        return None
+        result["rejection"] = f"Overextended above 1h EMA50 ({ext * 100:.1f}%)"
+        return result
 
     if not cond_net_15_pos or not cond_net_60_pos:
-        return None
+        result["rejection"] = "Net volume not positive"
+        return result
 
     # لو النتيجة أقل من حد معيّن، ما نبعتش أصلاً
     if score < 6:
-        return None
+        result["rejection"] = f"Score {score} below 6"
+        return result
 
     if score >= 9:
         grade = "🚀 Very Strong"
@@ -334,7 +444,7 @@ def build_signal(symbol: str) -> Optional[Dict]:
     # حاليًا كل الشروط صعودية → إشارة شراء (Long)
     side = "BUY"
 
-    return {
+    result["signal"] = {
         "symbol": symbol,
         "price": last_close,
         "quote_volume_24h": qv,
@@ -355,5 +465,11 @@ def build_signal(symbol: str) -> Optional[Dict]:
         "net_vol_1m": net_vol_1m,
         "net_vol_15": net_vol_15,
         "net_vol_60": net_vol_60,
+        "net_flow": flows,
         "side": side,
     }
+    return result
+
+
+def build_signal(symbol: str) -> Optional[Dict]:
+    return evaluate_symbol(symbol)["signal"]
@@ -0,0 +1,131 @@
+# signal_index.py
+
+import csv
+import logging
+import os
+import threading
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# كل الإشارات بالترتيب الزمني + فهارس بالرمز والـ grade (أرقام في _records)
+_records: List[Dict] = []
+_times: List[datetime] = []
+_by_symbol: Dict[str, List[int]] = {}
+_by_grade: Dict[str, List[int]] = {}
+_lock = threading.Lock()
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _normalize(row: Dict) -> Optional[Dict]:
+    """صف من signals_log.csv (أو نفس الحقول من log_signal) → record."""
+    try:
+        ts = row["timestamp_utc"]
+        when = ts if isinstance(ts, datetime) else datetime.fromisoformat(ts)
+    except (KeyError, ValueError):
+        return None
+    return {
+        "time": when,
+        "symbol": row.get("symbol", ""),
+        "side": row.get("side", "BUY"),
+        "grade": row.get("grade", ""),
+        "score": int(_to_float(row.get("score"))),
+        "price": _to_float(row.get("price")),
+        "rsi_15m": _to_float(row.get("rsi_15m")),
+        "change_24h": _to_float(row.get("change_24h_percent")),
+        "quote_volume_24h": _to_float(row.get("quote_volume_24h")),
+        "ping_count": int(_to_float(row.get("ping_count_24h"))),
+    }
+
+
+# ===============================
+#  Build
+# ===============================
+def add_signal(row: Dict) -> None:
+    """إضافة إشارة للفهرس (بيتنادى من log_signal)."""
+    rec = _normalize(row)
+    if rec is None:
+        return
+    with _lock:
+        # الـ log بيتكتب بالترتيب، فالـ append بيحافظ على ترتيب _times
+        idx = len(_records)
+        _records.append(rec)
+        _times.append(rec["time"])
+        _by_symbol.setdefault(rec["symbol"], []).append(idx)
+        _by_grade.setdefault(rec["grade"], []).append(idx)
+
+
+def clear() -> None:
+    """مسح الفهرس كله (للـ benchmarks / إعادة التشغيل)."""
+    with _lock:
+        _records.clear()
+        _times.clear()
+        _by_symbol.clear()
+        _by_grade.clear()
+
+
+def load_csv(path: str) -> int:
+    """قراءة الـ CSV مرة واحدة وقت التشغيل — بعد كده كله من الذاكرة."""
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    try:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                add_signal(row)
+                count += 1
+    except Exception as e:
+        logging.error(f"Error loading signal history: {e}")
+    return count
+
+
+# ===============================
+#  Queries
+# ===============================
+def _since_index(since: Optional[datetime]) -> int:
+    return bisect_left(_times, since) if since is not None else 0
+
+
+def last(n: int) -> List[Dict]:
+    with _lock:
+        return list(reversed(_records[-n:])) if n > 0 else []
+
+
+def for_symbol(symbol: str, since: Optional[datetime] = None, n: int = 20) -> List[Dict]:
+    with _lock:
+        idxs = _by_symbol.get(symbol, [])
+        start = _since_index(since)
+        picked = [_records[i] for i in idxs[bisect_left(idxs, start):]]
+        return list(reversed(picked[-n:]))
+
+
+def top(since: Optional[datetime] = None, n: int = 10) -> List[Dict]:
+    """أعلى الإشارات score (إشارة واحدة لكل رمز — الأعلى ثم الأحدث)."""
+    with _lock:
+        best: Dict[str, Dict] = {}
+        for rec in _records[_since_index(since):]:
+            cur = best.get(rec["symbol"])
+            if cur is None or rec["score"] >= cur["score"]:
+                best[rec["symbol"]] = rec
+    return sorted(best.values(), key=lambda r: (r["score"], r["time"]), reverse=True)[:n]
+
+
+def stats(since: Optional[datetime] = None) -> Dict:
+    with _lock:
+        start = _since_index(since)
+        window = _records[start:]
+        by_grade = {g: len(idxs) - bisect_left(idxs, start) for g, idxs in _by_grade.items()}
+        return {
+            "total": len(_records),
+            "in_window": len(window),
+            "symbols": len(_by_symbol),
+            "by_grade": {g: c for g, c in by_grade.items() if c},
+            "top_symbols": Counter(r["symbol"] for r in window).most_common(5),
+        }
@@ -0,0 +1,111 @@
+# snapshot.py
+
+import logging
+import os
+import pickle
+import time
+import zlib
+from array import array
+from typing import Dict, List
+
+from binance_client import export_cache_state, restore_cache_state
+from config import SNAPSHOT_FILE
+
+SNAPSHOT_VERSION = 1
+
+# ترتيب أعمدة الشمعة داخل الـ snapshot (كلها double — الأوقات بالمللي ثانية مضبوطة لحد 2^53)
+KLINE_FIELDS = ("open_time", "open", "high", "low", "close", "volume", "close_time")
+_INT_FIELDS = {"open_time", "close_time"}
+
+
+# ===============================
+#  Compact candle packing
+# ===============================
+def pack_klines(klines: List[Dict]) -> bytes:
+    """تحويل قائمة شموع لـ bytes (7 doubles لكل شمعة)."""
+    buf = array("d")
+    for k in klines:
+        buf.extend(float(k[f]) for f in KLINE_FIELDS)
+    return buf.tobytes()
+
+
+def unpack_klines(raw: bytes) -> List[Dict]:
+    buf = array("d")
+    buf.frombytes(raw)
+    width = len(KLINE_FIELDS)
+    klines = []
+    for i in range(0, len(buf), width):
+        row = buf[i:i + width]
+        klines.append({
+            f: (int(v) if f in _INT_FIELDS else v)
+            for f, v in zip(KLINE_FIELDS, row)
+        })
+    return klines
+
+
+# ===============================
+#  Save / load
+# ===============================
+def save_snapshot(last_alert_times: Dict, ping_state: Dict, path: str = SNAPSHOT_FILE) -> None:
+    """
+    حفظ الكاش (شموع + رموز) وحالة الـ dedup (آخر تنبيه + pings) على الديسك.
+    الكتابة على ملف مؤقت وبعدين os.replace علشان الملف ما يبقاش نصه مكتوب لو الـ Repl وقع.
+    """
+    try:
+        cache = export_cache_state()
+        payload = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "klines": {
+                f"{sym}|{interval}": pack_klines(kl)
+                for (sym, interval), kl in cache["klines"].items()
+            },
+            "symbols": cache["symbols"],
+            "symbols_fetched_at": cache["symbols_fetched_at"],
+            "last_alert_times": dict(last_alert_times),
+            "ping_state": {sym: dict(info) for sym, info in ping_state.items()},
+        }
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 6)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        logging.info(f"[SNAPSHOT] saved {len(payload['klines'])} series ({len(data):,} bytes)")
+    except Exception as e:
+        logging.error(f"Error saving snapshot: {e}")
+
+
+def load_snapshot(last_alert_times: Dict, ping_state: Dict, path: str = SNAPSHOT_FILE) -> bool:
+    """
+    استرجاع آخر snapshot (لو موجود) — يرجّع True لو الاسترجاع نجح (warm start).
+    """
+    if not os.path.exists(path):
+        return False
+
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.loads(zlib.decompress(f.read()))
+        if payload.get("version") != SNAPSHOT_VERSION:
+            logging.warning("[SNAPSHOT] version mismatch, starting cold")
+            return False
+
+        klines = {}
+        for key, raw in payload.get("klines", {}).items():
+            sym, interval = key.split("|", 1)
+            klines[(sym, interval)] = unpack_klines(raw)
+
+        restore_cache_state({
+            "klines": klines,
+            "symbols": payload.get("symbols", []),
+            "symbols_fetched_at": payload.get("symbols_fetched_at", 0.0),
+        })
+        last_alert_times.update(payload.get("last_alert_times", {}))
+        ping_state.update(payload.get("ping_state", {}))
+
+        age = time.time() - payload.get("saved_at", 0.0)
+        logging.info(f"[SNAPSHOT] restored {len(klines)} series (age {age:.0f}s)")
+        return True
+    except Exception as e:
+        logging.error(f"Error loading snapshot: {e}")
+        return False
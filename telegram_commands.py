@@ -0,0 +1,220 @@
+# telegram_commands.py
+
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import requests
+
+import signal_index
+from scanner_logic import evaluate_symbol
+from telegram_bot import send_alert
+from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_URL, TELEGRAM_POLL_TIMEOUT
+
+MAX_LAST = 50
+SYMBOL_RE = re.compile(r"[A-Z0-9]{1,20}")
+
+HELP_TEXT = (
+    "*Commands:*\n"
+    "/top — أعلى إشارات النهارده\n"
+    "/symbol XYZ — إشارات عملة معيّنة النهارده\n"
+    "/last N — آخر N إشارة\n"
+    "/stats — إحصائيات الإشارات\n"
+    "/scan XYZ — تقييم فوري لعملة (من الشموع المتخزنة)"
+)
+
+
+# ===============================
+#  Formatting helpers
+# ===============================
+def _today() -> datetime:
+    now = datetime.utcnow()
+    return datetime(now.year, now.month, now.day)
+
+
+def _normalize_symbol(arg: str) -> Optional[str]:
+    """"btc" / "$BTC" → "BTCUSDT". أي حاجة غير [A-Z0-9] → None (علشان ما تكسرش الـ Markdown)."""
+    sym = arg.strip().upper().lstrip("$#")
+    if not SYMBOL_RE.fullmatch(sym):
+        return None
+    if not sym.endswith("USDT"):
+        sym += "USDT"
+    return sym
+
+
+def _escape_md(text: str) -> str:
+    """Escape لرموز Markdown (legacy) في نص مش بتاعنا (زي رسايل الـ exceptions)."""
+    return re.sub(r"([_*`\[])", r"\\\1", text)
+
+
+def _fmt_record(rec: Dict) -> str:
+    return (
+        f"`{rec['time']:%m-%d %H:%M}` *{rec['symbol']}* "
+        f"{rec['grade']} (score `{rec['score']}`) @ `{rec['price']}`"
+    )
+
+
+def _fmt_records(title: str, records: List[Dict]) -> str:
+    if not records:
+        return f"{title}\nNo signals."
+    return title + "\n" + "\n".join(_fmt_record(r) for r in records)
+
+
+# ===============================
+#  Commands
+# ===============================
+def cmd_top(args: List[str]) -> str:
+    return _fmt_records("🏆 *Top signals today (UTC):*", signal_index.top(since=_today()))
+
+
+def cmd_symbol(args: List[str]) -> str:
+    sym = _normalize_symbol(args[0]) if args else None
+    if sym is None:
+        return "Usage: /symbol XYZ"
+    records = signal_index.for_symbol(sym, since=_today())
+    if records:
+        return _fmt_records(f"🔎 *{sym} signals today (UTC):*", records)
+    previous = signal_index.for_symbol(sym, n=1)
+    if previous:
+        return f"🔎 No {sym} signals today. Last one:\n{_fmt_record(previous[0])}"
+    return f"🔎 No signals for {sym}."
+
+
+def cmd_last(args: List[str]) -> str:
+    try:
+        n = int(args[0]) if args else 10
+    except ValueError:
+        return "Usage: /last N"
+    n = max(1, min(n, MAX_LAST))
+    return _fmt_records(f"🕒 *Last {n} signals:*", signal_index.last(n))
+
+
+def cmd_stats(args: List[str]) -> str:
+    all_time = signal_index.stats()
+    today = signal_index.stats(since=_today())
+    grades = "\n".join(f"• {g}: `{c}`" for g, c in sorted(today["by_grade"].items())) or "• -"
+    tops = ", ".join(f"{s} ({c})" for s, c in today["top_symbols"]) or "-"
+    return (
+        "📊 *Signal stats*\n"
+        f"Total: `{all_time['total']}` signals / `{all_time['symbols']}` symbols\n"
+        f"Today (UTC): `{today['in_window']}`\n"
+        f"*By grade today:*\n{grades}\n"
+        f"*Most active today:* {tops}"
+    )
+
+
+def cmd_scan(args: List[str]) -> str:
+    sym = _normalize_symbol(args[0]) if args else None
+    if sym is None:
+        return "Usage: /scan XYZ"
+    try:
+        result = evaluate_symbol(sym)
+    except Exception as e:
+        return f"⚠️ Scan failed for {sym}: {_escape_md(str(e))}"
+
+    reasons = "\n".join(f"• {r}" for r in result["reasons"]) or "• -"
+    if result["signal"]:
+        verdict = f"✅ Signal: {result['signal']['grade']}"
+    else:
+        verdict = f"❌ No signal: {result['rejection']}"
+    return (
+        f"🔬 *{sym}* score `{result['score']}`\n"
+        f"{verdict}\n"
+        f"*Passed:*\n{reasons}"
+    )
+
+
+COMMANDS = {
+    "/top": cmd_top,
+    "/symbol": cmd_symbol,
+    "/last": cmd_last,
+    "/stats": cmd_stats,
+    "/scan": cmd_scan,
+    "/help": lambda args: HELP_TEXT,
+    "/start": lambda args: HELP_TEXT,
+}
+
+
+def handle_command(text: str) -> str:
+    parts = text.strip().split()
+    if not parts:
+        return HELP_TEXT
+    # "/top@MyBot" → "/top"
+    name = parts[0].split("@", 1)[0].lower()
+    handler = COMMANDS.get(name)
+    if handler is None:
+        return HELP_TEXT
+    return handler(parts[1:])
+
+
+# ===============================
+#  Long polling (getUpdates)
+# ===============================
+def get_updates(offset: int, timeout: int = TELEGRAM_POLL_TIMEOUT) -> List[Dict]:
+    url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_TOKEN}/getUpdates"
+    params = {
+        "offset": offset,
+        "timeout": timeout,
+        "allowed_updates": '["message"]',
+    }
+    resp = requests.get(url, params=params, timeout=timeout + 10)
+    resp.raise_for_status()
+    return resp.json().get("result", [])
+
+
+def _skip_pending() -> int:
+    """
+    الـ offset بعد آخر update موجود دلوقتي (offset=-1 بيرجّع آخر واحد بس) —
+    علشان الأوامر القديمة ما تتنفذش تاني بعد كل restart.
+    """
+    while True:
+        try:
+            updates = get_updates(-1, timeout=0)
+            return updates[-1]["update_id"] + 1 if updates else 0
+        except Exception as e:
+            logging.error(f"Error skipping pending Telegram updates: {e}")
+            time.sleep(5)
+
+
+def poll_commands(stop: Optional[threading.Event] = None):
+    """
+    Loop بيستنى أوامر من الشات المسموح بيه بس (TELEGRAM_CHAT_ID) ويرد عليها.
+    الأوامر اللي وصلت قبل التشغيل بتتجاهل. stop (للتستات) بيوقف الـ loop.
+    """
+    offset = _skip_pending()
+    while stop is None or not stop.is_set():
+        try:
+            updates = get_updates(offset)
+        except Exception as e:
+            logging.error(f"Error polling Telegram updates: {e}")
+            time.sleep(5)
+            continue
+
+        for upd in updates:
+            offset = max(offset, upd["update_id"] + 1)
+            msg = upd.get("message") or {}
+            text = msg.get("text", "")
+            chat_id = str(msg.get("chat", {}).get("id", ""))
+            if not text.startswith("/") or chat_id != str(TELEGRAM_CHAT_ID):
+                continue
+            try:
+                reply = handle_command(text)
+            except Exception as e:
+                logging.error(f"Error handling command {text!r}: {e}")
+                reply = "⚠️ Command failed."
+            send_alert(reply, chat_id=chat_id)
+
+
+def start_command_listener():
+    """
+    تشغيل الـ long polling في Thread منفصل علشان ما يعطلش السكان.
+    """
+    if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
+        logging.info("Telegram credentials not set. Command listener disabled.")
+        return
+    t = threading.Thread(target=poll_commands, name="telegram-commands")
+    t.daemon = True
+    t.start()
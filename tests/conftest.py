@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import signal_index  # noqa: E402
+
+SIGNALS_CSV = """\
+timestamp_utc,symbol,side,grade,score,price,rsi_15m,change_24h_percent,quote_volume_24h,ping_count_24h
+2024-01-17T09:00:00,BTCUSDT,BUY,🔥 Strong,9,67000.5,55.1,3.2,900000000,1
+2024-01-18T08:00:00,ETHUSDT,BUY,✅ Medium,7,2500.25,52.0,2.1,400000000,1
+2024-01-18T09:30:00,BTCUSDT,BUY,✅ Medium,7,67500.0,58.3,3.9,950000000,2
+2024-01-18T10:15:00,SOLUSDT,BUY,🔥 Strong,8,150.75,61.2,6.4,120000000,1
+2024-01-18T11:45:00,BTCUSDT,BUY,🔥 Strong,8,68000.0,60.0,4.5,990000000,3
+"""
+
+
+@pytest.fixture
+def signals_csv(tmp_path):
+    """signals_log.csv صغير محمّل في signal_index (وبيتمسح بعد التست)."""
+    path = tmp_path / "signals_log.csv"
+    path.write_text(SIGNALS_CSV, encoding="utf-8")
+    signal_index.clear()
+    signal_index.load_csv(str(path))
+    yield path
+    signal_index.clear()
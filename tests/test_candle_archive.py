@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+import pytest
+
+import candle_archive
+from candle_archive import RECORD_DTYPE
+
+STEP = 900_000  # 15m
+T0 = 1_700_000_000_000 // STEP * STEP
+
+
+def kline(i):
+    t = T0 + i * STEP
+    return {"open_time": t, "open": 1.0 + i, "high": 2.0 + i, "low": 0.5 + i,
+            "close": 1.5 + i, "volume": 10.0 * i, "close_time": t + STEP - 1}
+
+
+def klines(*idx):
+    return [kline(i) for i in idx]
+
+
+NOW = T0 + 1_000 * STEP
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(candle_archive, "CANDLE_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(candle_archive, "_index", {})
+    monkeypatch.setattr(candle_archive, "_index_loaded", False)
+    monkeypatch.setattr(candle_archive, "_index_dirty", False)
+    monkeypatch.setattr(candle_archive, "_maps", candle_archive.OrderedDict())
+    return tmp_path
+
+
+def open_times(records):
+    return [(int(t) - T0) // STEP for t in records["open_time"]]
+
+
+def test_append_closed_skips_open_and_already_archived_candles():
+    assert candle_archive.append_closed("BTCUSDT", "15m", klines(0, 1, 2), now_ms=NOW) == 3
+    # 1 و 2 موجودين، 4 لسه مفتوحة
+    live = T0 + 4 * STEP + 10
+    assert candle_archive.append_closed("BTCUSDT", "15m", klines(1, 2, 3, 4), now_ms=live) == 1
+    assert open_times(candle_archive.read_range("BTCUSDT", "15m")) == [0, 1, 2, 3]
+    assert candle_archive.to_klines(candle_archive.tail("BTCUSDT", "15m", 1)) == klines(3)
+
+
+def test_ranges_and_row_lookup_across_gaps():
+    candle_archive.append_closed("BTCUSDT", "15m", klines(0, 1, 2, 5, 6, 10), now_ms=NOW)
+    assert candle_archive.time_ranges("BTCUSDT", "15m") == [
+        [T0, T0 + 2 * STEP], [T0 + 5 * STEP, T0 + 6 * STEP], [T0 + 10 * STEP, T0 + 10 * STEP]]
+
+    entry = candle_archive._entry("BTCUSDT_15m")
+    row = lambda i: candle_archive._row_for(entry, T0 + i * STEP)
+    assert [row(i) for i in (-1, 0, 2, 3, 4, 5, 6, 7, 10, 11)] == [0, 0, 2, 3, 3, 3, 4, 5, 5, 6]
+    # جوه الشمعة (مش على الحد) → الصف اللي بعدها
+    assert candle_archive._row_for(entry, T0 + 5 * STEP + 1) == 4
+
+    rr = lambda a, b: open_times(candle_archive.read_range("BTCUSDT", "15m", T0 + a * STEP, T0 + b * STEP))
+    assert rr(0, 3) == [0, 1, 2]
+    assert rr(2, 6) == [2, 5]
+    assert rr(3, 5) == []
+    assert rr(4, 11) == [5, 6, 10]
+    assert rr(11, 20) == []
+
+
+def test_reads_are_zero_copy_views():
+    candle_archive.append_closed("BTCUSDT", "15m", klines(*range(50)), now_ms=NOW)
+    view = candle_archive.read_range("BTCUSDT", "15m", T0 + 10 * STEP, T0 + 20 * STEP)
+    assert len(view) == 10
+    assert isinstance(view.base, np.memmap) or isinstance(view, np.memmap)
+    assert not view.flags.owndata
+
+
+def test_tail_bounds():
+    candle_archive.append_closed("BTCUSDT", "15m", klines(0, 1, 2), now_ms=NOW)
+    assert len(candle_archive.tail("BTCUSDT", "15m", 0)) == 0
+    assert len(candle_archive.tail("BTCUSDT", "15m", -1)) == 0
+    assert open_times(candle_archive.tail("BTCUSDT", "15m", 2)) == [1, 2]
+    assert open_times(candle_archive.tail("BTCUSDT", "15m", 10)) == [0, 1, 2]
+    assert len(candle_archive.tail("ETHUSDT", "15m", 5)) == 0
+
+
+def test_index_survives_restart(archive_dir, monkeypatch):
+    candle_archive.append_closed("BTCUSDT", "15m", klines(0, 1, 4), now_ms=NOW)
+    candle_archive.flush_index()
+    assert (archive_dir / candle_archive.INDEX_FILE).exists()
+
+    monkeypatch.setattr(candle_archive, "_index", {})
+    monkeypatch.setattr(candle_archive, "_index_loaded", False)
+    assert candle_archive.time_ranges("BTCUSDT", "15m") == [[T0, T0 + STEP], [T0 + 4 * STEP, T0 + 4 * STEP]]
+
+
+def test_torn_tail_is_truncated_before_append(archive_dir):
+    candle_archive.append_closed("BTCUSDT", "15m", klines(0, 1), now_ms=NOW)
+    path = archive_dir / "BTCUSDT_15m.bin"
+    # الكتابة الجاية اتقطعت في النص
+    with open(path, "ab") as f:
+        f.write(np.array([tuple(kline(2).values())], dtype=RECORD_DTYPE).tobytes()[:20])
+    assert os.path.getsize(path) == 2 * RECORD_DTYPE.itemsize + 20
+
+    assert candle_archive.append_closed("BTCUSDT", "15m", klines(2, 3), now_ms=NOW) == 2
+    assert os.path.getsize(path) == 4 * RECORD_DTYPE.itemsize
+    assert candle_archive.to_klines(candle_archive.read_range("BTCUSDT", "15m")) == klines(0, 1, 2, 3)
+    assert candle_archive.time_ranges("BTCUSDT", "15m") == [[T0, T0 + 3 * STEP]]
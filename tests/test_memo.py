@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+import memo
+from scanner_logic import (
+    breakout_level, closed_fingerprint, ema, ema_step, rsi_history, score_symbol,
+)
+from config import BREAKOUT_LOOKBACK, RSI_PERIOD, RSI_RECENT_LOOKBACK, EMA_FAST_PERIOD, EMA_SLOW_PERIOD
+
+STEPS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000}
+
+
+def klines(rng, n, interval):
+    step = STEPS[interval]
+    t0 = 1_700_000_000_000 // step * step
+    price = rng.uniform(0.5, 500)
+    out = []
+    for i in range(n):
+        open_p = price
+        price = max(0.01, price * (1 + rng.gauss(0.0005, 0.02)))
+        out.append({
+            "open_time": t0 + i * step,
+            "open": open_p,
+            "high": max(open_p, price) * (1 + rng.random() * 0.01),
+            "low": min(open_p, price) * (1 - rng.random() * 0.01),
+            "close": price,
+            "volume": rng.lognormvariate(8, 1.5),
+            "close_time": t0 + (i + 1) * step - 1,
+        })
+    return out
+
+
+def new_live_candle(rng, series):
+    """نفس الشموع المقفولة — الشمعة الحالية بس اتغيرت (زي سكان تاني قبل ما تتقفل)."""
+    last = dict(series[-1])
+    last["close"] = last["open"] * (1 + rng.gauss(0, 0.03))
+    last["high"] = max(last["high"], last["open"], last["close"])
+    last["low"] = min(last["low"], last["open"], last["close"])
+    last["volume"] *= rng.uniform(1, 5)
+    return series[:-1] + [last]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_warm_stage_memos_match_full_recompute(seed):
+    rng = random.Random(seed)
+    symbol = f"T{seed}USDT"
+    m, f, h, kl_1m = (klines(rng, 80, "15m"), klines(rng, 40, "5m"),
+                      klines(rng, 80, "1h"), klines(rng, 20, "1m"))
+    qv, change = rng.uniform(1e6, 1e8), rng.uniform(-5, 30)
+
+    score_symbol(symbol, qv, change, m, f, h, kl_1m, {})  # تسخين الـ stage memos
+    m, h = new_live_candle(rng, m), new_live_candle(rng, h)
+    hits = {name: s["hits"] for name, s in memo.stats().items()}
+    warm = score_symbol(symbol, qv, change, m, f, h, kl_1m, {})
+    assert all(memo.stats()[name]["hits"] > n for name, n in hits.items())
+
+    # قيم المراحل المتخزنة = نفس الحساب الكامل على الشموع الحالية
+    closes, highs = [k["close"] for k in m], [k["high"] for k in m]
+    closes_1h = [k["close"] for k in h]
+    fp_15, fp_1h = closed_fingerprint(m), closed_fingerprint(h)
+    assert memo.stage("breakout_15m").lookup(symbol, fp_15) == breakout_level(highs, BREAKOUT_LOOKBACK)
+    assert memo.stage("rsi_15m_hist").lookup(symbol, fp_15) == rsi_history(closes, RSI_PERIOD, RSI_RECENT_LOOKBACK)
+    assert memo.stage("ema_1h").lookup(symbol, fp_1h) == (
+        ema(closes_1h[:-1], EMA_FAST_PERIOD), ema(closes_1h[:-1], EMA_SLOW_PERIOD))
+
+    memo.clear()
+    assert warm == score_symbol(symbol, qv, change, m, f, h, kl_1m, {})
+
+
+@pytest.mark.parametrize("period", [EMA_FAST_PERIOD, EMA_SLOW_PERIOD])
+def test_ema_step_extends_ema_by_one_value(period):
+    rng = random.Random(period)
+    for n in (period + 1, period + 2, 80, 500):
+        v = [rng.uniform(1, 100) for _ in range(n)]
+        assert ema_step(ema(v[:-1], period), v[-1], period) == ema(v, period)
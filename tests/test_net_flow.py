@@ -0,0 +1,97 @@
+import pytest
+
+import net_flow
+
+T0 = 1_700_000_000_000
+SCAN_MS = 300_000
+
+
+class FakeExchange:
+    """aggTrades بمعدل ثابت (صفقة كل interval_ms) + ساعة قابلة للتحكم."""
+
+    def __init__(self, trades_per_min: int):
+        self.interval_ms = 60_000 / trades_per_min
+        self.now_ms = T0
+        self.calls = 0
+
+    def time(self) -> float:
+        return self.now_ms / 1000
+
+    def _trade(self, i: int) -> dict:
+        return {"a": i, "p": "1", "q": "1", "T": int(T0 + i * self.interval_ms), "m": i % 3 == 0}
+
+    def _last_id(self) -> int:
+        return int((self.now_ms - T0) / self.interval_ms)
+
+    def get_agg_trades(self, symbol, from_id=None, limit=1000):
+        self.calls += 1
+        last = self._last_id()
+        start = max(0, last - limit + 1) if from_id is None else from_id
+        return [self._trade(i) for i in range(start, min(last, start + limit - 1) + 1)]
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    def make(trades_per_min):
+        ex = FakeExchange(trades_per_min)
+        monkeypatch.setattr(net_flow, "get_agg_trades", ex.get_agg_trades)
+        monkeypatch.setattr(net_flow, "time", ex)
+        return ex
+
+    for state in (net_flow._rings, net_flow._last_ids, net_flow._lagging):
+        state.clear()
+    return make
+
+
+def run_scans(ex, symbol, scans):
+    calls = []
+    for _ in range(scans):
+        ex.now_ms += SCAN_MS
+        before = ex.calls
+        net_flow.poll_symbol(symbol)
+        calls.append(ex.calls - before)
+    return calls
+
+
+def test_fast_pair_is_flagged_lagging_and_stops_polling(exchange):
+    # 2,000 aggTrades/min = 10,000 per scan > 3 pages of 1,000
+    ex = exchange(2_000)
+    calls = run_scans(ex, "FASTUSDT", 30)
+
+    assert net_flow.is_lagging("FASTUSDT")
+    assert net_flow.net_flows("FASTUSDT", ex.now_ms) == {}
+    # كل محاولة = poll أولي + NET_FLOW_MAX_PAGES صفحة، ومحاولة تانية بس بعد الـ retry window
+    retries = 30 * SCAN_MS // (net_flow.NET_FLOW_LAG_RETRY_SECONDS * 1000)
+    assert sum(calls) <= (1 + retries) * (1 + net_flow.NET_FLOW_MAX_PAGES)
+    assert calls.count(0) >= 30 - 2 * (1 + retries)
+
+
+def test_lagging_pair_is_retried_after_the_retry_window(exchange):
+    ex = exchange(2_000)
+    run_scans(ex, "FASTUSDT", 2)
+    assert net_flow.is_lagging("FASTUSDT")
+
+    ex.now_ms += net_flow.NET_FLOW_LAG_RETRY_SECONDS * 1000
+    net_flow.poll_symbol("FASTUSDT")
+    assert not net_flow.is_lagging("FASTUSDT")
+
+
+def test_normal_pair_gets_full_coverage(exchange):
+    ex = exchange(300)
+    run_scans(ex, "SLOWUSDT", 30)
+
+    flows = net_flow.net_flows("SLOWUSDT", ex.now_ms)
+    assert not net_flow.is_lagging("SLOWUSDT")
+    assert set(flows) == set(net_flow.NET_FLOW_WINDOWS_MINUTES)
+    # كل صفقة 1 USDT، تلت الصفقات taker sell → net ≈ ثلث عدد الصفقات في الـ window
+    assert flows[60] == pytest.approx(300 * 60 / 3, rel=0.02)
+
+
+def test_same_page_ingested_twice_is_counted_once(exchange):
+    ex = exchange(300)
+    ex.now_ms += 120_000
+    page = ex.get_agg_trades("XUSDT")
+    net_flow.ingest_trades("XUSDT", page)
+    once = net_flow.net_flows("XUSDT", ex.now_ms)
+    net_flow.ingest_trades("XUSDT", page)
+    assert net_flow.net_flows("XUSDT", ex.now_ms) == once
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import signal_index
+
+
+def test_load_csv_counts_rows(signals_csv):
+    signal_index.clear()
+    assert signal_index.load_csv(str(signals_csv)) == 5
+
+
+def test_for_symbol_since_filter(signals_csv):
+    all_btc = signal_index.for_symbol("BTCUSDT")
+    assert [r["time"].hour for r in all_btc] == [11, 9, 9]  # الأحدث الأول
+
+    today = signal_index.for_symbol("BTCUSDT", since=datetime(2024, 1, 18))
+    assert [r["price"] for r in today] == [68000.0, 67500.0]
+    assert signal_index.for_symbol("BTCUSDT", since=datetime(2024, 1, 18, 12)) == []
+    assert signal_index.for_symbol("XRPUSDT") == []
+
+
+def test_top_keeps_best_signal_per_symbol(signals_csv):
+    top = signal_index.top()
+    assert [(r["symbol"], r["score"]) for r in top] == [("BTCUSDT", 9), ("SOLUSDT", 8), ("ETHUSDT", 7)]
+
+    today = signal_index.top(since=datetime(2024, 1, 18))
+    # BTC: 8 و 7 النهارده → الـ 8؛ SOL كمان 8 بس أقدم
+    assert [(r["symbol"], r["score"]) for r in today] == [("BTCUSDT", 8), ("SOLUSDT", 8), ("ETHUSDT", 7)]
+
+
+def test_stats_by_grade(signals_csv):
+    all_time = signal_index.stats()
+    assert all_time["total"] == 5
+    assert all_time["symbols"] == 3
+    assert all_time["by_grade"] == {"🔥 Strong": 3, "✅ Medium": 2}
+
+    today = signal_index.stats(since=datetime(2024, 1, 18, 9))
+    assert today["in_window"] == 3
+    assert today["by_grade"] == {"✅ Medium": 1, "🔥 Strong": 2}
+    assert today["top_symbols"][0] == ("BTCUSDT", 2)
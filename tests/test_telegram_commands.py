@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import telegram_bot
+import telegram_commands
+
+ALLOWED_CHAT = 42
+OTHER_CHAT = 99
+
+
+def update(update_id, chat_id, text):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "text": text}}
+
+
+class StubTelegram:
+    """
+    Telegram Bot API متزيف على localhost: getUpdates (مع offset=-1) + sendMessage.
+    الـ updates الجديدة بتوصل بعد ما البوت يعدّي القديمة (زي restart حقيقي).
+    """
+
+    def __init__(self, pending, new):
+        self.updates = list(pending)
+        self.new = list(new)
+        self.get_params = []
+        self.sent = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                assert url.path == "/botTEST/getUpdates"
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stub.get_params.append(params)
+                offset = int(params["offset"])
+                if offset == -1:
+                    result = stub.updates[-1:]
+                    stub.updates += stub.new
+                else:
+                    result = [u for u in stub.updates if u["update_id"] >= offset]
+                    if not result:
+                        time.sleep(0.05)
+                self._reply({"ok": True, "result": result})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                assert url.path == "/botTEST/sendMessage"
+                length = int(self.headers["Content-Length"])
+                body = parse_qs(self.rfile.read(length).decode("utf-8"))
+                stub.sent.append({k: v[0] for k, v in body.items()})
+                self._reply({"ok": True, "result": {}})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub(monkeypatch, signals_csv):
+    srv = StubTelegram(
+        pending=[update(100, ALLOWED_CHAT, "/stats")],
+        new=[update(101, ALLOWED_CHAT, "/last 2"), update(102, OTHER_CHAT, "/symbol btc")],
+    )
+    for module in (telegram_commands, telegram_bot):
+        monkeypatch.setattr(module, "TELEGRAM_API_URL", srv.url)
+        monkeypatch.setattr(module, "TELEGRAM_TOKEN", "TEST")
+        monkeypatch.setattr(module, "TELEGRAM_CHAT_ID", str(ALLOWED_CHAT))
+    yield srv
+    srv.close()
+
+
+def run_listener(stub, until, timeout=5.0):
+    stop = threading.Event()
+    t = threading.Thread(target=telegram_commands.poll_commands, args=(stop,), daemon=True)
+    t.start()
+    deadline = time.time() + timeout
+    while not until() and time.time() < deadline:
+        time.sleep(0.02)
+    stop.set()
+    t.join(timeout)
+    assert not t.is_alive()
+
+
+def test_listener_against_stub_server(stub):
+    run_listener(stub, until=lambda: len(stub.get_params) >= 3)
+
+    # أول نداء بيعدّي القديم من غير انتظار، بعد كده offset = آخر update + 1
+    offsets = [(int(p["offset"]), int(p["timeout"])) for p in stub.get_params]
+    assert offsets[0] == (-1, 0)
+    assert offsets[1] == (101, telegram_commands.TELEGRAM_POLL_TIMEOUT)
+    assert all(o == 103 for o, _ in offsets[2:])
+
+    # /stats القديمة ما اتنفذتش، و /symbol من شات تاني اتجاهلت
+    assert len(stub.sent) == 1
+    msg = stub.sent[0]
+    assert msg["chat_id"] == str(ALLOWED_CHAT)
+    assert msg["parse_mode"] == "Markdown"
+    lines = msg["text"].split("\n")
+    assert lines[0] == "🕒 *Last 2 signals:*"
+    assert "*BTCUSDT*" in lines[1] and "`68000.0`" in lines[1]
+    assert "*SOLUSDT*" in lines[2] and "`150.75`" in lines[2]
+
+
+def test_symbol_command_replies_from_index(stub):
+    stub.new = [update(101, ALLOWED_CHAT, "/symbol $btc")]
+    run_listener(stub, until=lambda: stub.sent)
+
+    text = stub.sent[0]["text"]
+    # الـ fixture مش النهارده → آخر إشارة بس
+    assert text.startswith("🔎 No BTCUSDT signals today. Last one:")
+    assert "`68000.0`" in text
+
+
+def test_rejects_symbols_that_would_break_markdown():
+    assert telegram_commands.handle_command("/symbol *x_[") == "Usage: /symbol XYZ"
+    assert telegram_commands.handle_command("/scan") == "Usage: /scan XYZ"